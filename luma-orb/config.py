@@ -1,5 +1,3 @@
-import pygame
-
 class Config:
     def __init__(self):
         # UI Settings
@@ -23,8 +21,38 @@ class Config:
         
         # Paths & AI
         self.local_model = "phi3"
+        # Model tiers: casual chatter goes fast, engineering goes deep (see luma_router.py)
+        self.model_tiers = {
+            "fast": {"model": "qwen2.5:1.5b", "num_predict": 80, "timeout": 10,
+                     "first_token_budget": 1.5, "max_inflight": 2},
+            "deep": {"model": self.local_model, "num_predict": 200, "timeout": 30,
+                     "first_token_budget": 4.0, "max_inflight": 1},
+        }
+        self.router_ewma_alpha = 0.3  # Weight of the newest latency sample
+        self.router_cooldown = 120    # Seconds a degraded/missing tier sits out
+        self.router_short_words = 3   # Queries this short go to the fast tier even if technical
         self.ollama_url = "http://localhost:11434/api/generate"
         self.wake_word = "luma"
         
+        # Model residency (see luma_residency.py)
+        self.model_idle_unload = {"xtts": 15 * 60, "whisper": None}  # Seconds idle; None = stay resident
+        self.mode_models = {"away": ["whisper"]}  # Modes listed keep only these models (wake word stays live)
+        self.model_mode_grace = 60      # Seconds a just-used model survives a mode that excludes it
+        self.model_sweep_interval = 5
+        self.xtts_int8 = True           # Dynamic int8 quantization for XTTS on CPU
+        
+        # Telemetry (PULSE + HERNING_STN ribbon)
+        self.telemetry_interval = 1.0   # Seconds between samples
+        self.telemetry_history = 120    # Samples kept per ring buffer
+        self.weather_source = "open-meteo"  # or "stub" for offline/testing
+        self.weather_lat, self.weather_lon = 56.14, 8.97  # Herning
+        self.weather_ttl = 600          # Seconds before the cache refreshes
+        
+        # Headless service mode (luma_service.py)
+        self.service_host = "127.0.0.1"  # Bind wider to serve other machines' HUDs
+        self.service_port = 8765
+        self.service_llm_slots = 1       # Concurrent generations against Ollama
+        self.service_reply_memory = 256  # Clients whose last reply is kept for "archive this"
+        
         # Engineering Constraints
         self.max_history = 6
\ No newline at end of file
@@ -1,14 +1,50 @@
 # energy_orb.py - V2 Visual Cortex
 import pygame
 import math
+import datetime
+import numpy as np
 
 class EnergyOrb:
     def __init__(self):
         pass
 
-    def draw(self, screen, center, radius, t, base_color, is_thinking, mode, cfg, ops, chat_active, resp, voice):
+    def sparkline(self, screen, color, rect, series, ceiling=100.0):
+        """Plots a telemetry ring buffer straight into a rect (newest sample on the right)."""
+        if len(series) < 2:
+            return
+        x, y, w, h = rect
+        # Vectorised point mapping - no per-sample Python math in the frame loop
+        xs = x + np.linspace(0, w, len(series))
+        ys = y + h - np.clip(series / max(ceiling, 1e-6), 0.0, 1.0) * h
+        pygame.draw.lines(screen, color, False, np.column_stack((xs, ys)).tolist(), 1)
+
+    def draw_ribbon(self, screen, cfg, color, telemetry):
+        """Top-bar ribbon: PULSE (uptime + CPU history) and HERNING_STN (weather + clock)."""
+        font = pygame.font.SysFont("Consolas", 14)
+
+        # PULSE
+        cpu_now = telemetry.cpu.latest()
+        pulse = font.render(f"PULSE: {telemetry.uptime()} | CPU {cpu_now:4.1f}%", True, color)
+        screen.blit(pulse, (20, 20))
+        self.sparkline(screen, color, (20, 40, 160, 24), telemetry.cpu.view())
+        self.sparkline(screen, (80, 80, 120), (20, 40, 160, 24), telemetry.mem.view())
+
+        # HERNING_STN (cached - never waits on the network)
+        wx = telemetry.weather.get()
+        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        if wx and wx.get("temp_c") is not None:
+            station = f"HERNING_STN: {wx['temp_c']:.1f}C WIND {wx.get('wind_kmh', 0):.0f}KM/H | {stamp}"
+        else:
+            station = f"HERNING_STN: --.-C | {stamp}"
+        screen.blit(font.render(station, True, color), (20, 70))
+
+    def draw(self, screen, center, radius, t, base_color, is_thinking, mode, cfg, ops, chat_active, resp, voice, telemetry=None):
         color = cfg.mode_palette.get(mode, base_color)
         
+        # --- TOP-LEFT TELEMETRY RIBBON ---
+        if telemetry:
+            self.draw_ribbon(screen, cfg, color, telemetry)
+        
         # --- TOP-RIGHT METADATA ---
         font = pygame.font.SysFont("Consolas", 14)
         metadata = [
@@ -17,6 +53,11 @@ class EnergyOrb:
             f"STAT: { 'THINKING' if is_thinking else 'LISTENING' if not voice.is_speaking else 'SPEAKING' }",
             f"HUB: HERNING_STATION"
         ]
+        # Neural residency: what's actually holding RAM right now
+        residency = getattr(voice, "residency", None)
+        if residency:
+            for name, info in residency.report().items():
+                metadata.append(f"{name.upper()[:4]}: {info['rss_mb']:.0f}MB" if info["resident"] else f"{name.upper()[:4]}: IDLE")
         for i, text in enumerate(metadata):
             txt_surf = font.render(text, True, color)
             screen.blit(txt_surf, (cfg.width - 180, 20 + (i * 18)))
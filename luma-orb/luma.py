@@ -1,21 +1,26 @@
 # luma.py - V2 Cognitive Core with Markdown Grounding
+import json
 import requests
 import threading
 import time
 from pathlib import Path
 from luma_skills import LumaSkills
 from luma_ops import LumaOps
+from luma_router import ModelRouter
 
 class Luma:
     def __init__(self, cfg):
         self.cfg = cfg
         self.voice_engine = None
+        self.telemetry = None
         self.is_thinking = False
+        self._cancel = None  # threading.Event for the generation in flight
         self.current_mode = "STANDARD"
         self.response_text = "L.U.M.A. V2 'Whisper-Grade' Online. Awaiting input."
         self.knowledge_dir = Path("knowledge")
         self.ops = LumaOps(knowledge_dir=self.knowledge_dir)
         self.skills = LumaSkills(self, self.ops)
+        self.router = ModelRouter(cfg)
         
         # Initialize knowledge containers
         self.persona_md = ""
@@ -66,27 +71,42 @@ class Luma:
         print(f"LUMA_LOG: Processing input: {text} ({method})")
         
         # 1. Skill Check (Fast Path)
-        skill_found = False
-        for trigger, skill_func in self.skills.registry.items():
-            if trigger in text.lower():
-                response = skill_func(text)
-                self._dispatch_feedback(response, is_quiet=(method=="chat"))
-                skill_found = True
-                break
+        response = self.run_skill(text)
+        if response is not None:
+            self._dispatch_feedback(response, is_quiet=(method=="chat"))
         
         # 2. LLM Generation (Slow Path)
-        if not skill_found:
-            tokens = 60 if self.current_mode == "DEEPWORK" else 150
+        else:
             threading.Thread(target=self._generate_response, 
-                             args=(text, tokens, method=="chat"), daemon=True).start()
+                             args=(text, method=="chat"), daemon=True).start()
 
-    def _generate_response(self, text, tokens, is_quiet):
-        self.is_thinking = True
+    def set_mode(self, mode):
+        """Switches the station mode (STANDARD, DEEPWORK, AWAY); model residency follows it."""
+        self.current_mode = mode.upper()
+        print(f"LUMA_LOG: Mode set to {self.current_mode}.")
+        return self.current_mode
+
+    def run_skill(self, text, last_reply=None, remote=False):
+        """Returns the first matching skill's reply, or None if no trigger fires.
+
+        Remote (service) callers pass their own last reply and can't trigger
+        skills that act on the host machine.
+        """
+        for trigger, skill_func in self.skills.registry.items():
+            if trigger in text.lower():
+                if remote and skill_func in self.skills.host_only:
+                    return "That one only runs at the station itself, Lau."
+                if skill_func in self.skills.reply_aware:
+                    return skill_func(text, last_reply=last_reply)
+                return skill_func(text)
+        return None
+
+    def _build_payload(self, text, tier, stream=False):
         self.refresh_knowledge() 
 
         # 1. SAFE HISTORY EXTRACTION
-        # We ensure session is a list and take the last 3 entries safely.
-        recent_history = list(self.session)[-3:] if self.session else []
+        # session.json may still hold the shutdown summary dict, so keep only exchanges.
+        recent_history = [m for m in self.session if isinstance(m, dict)][-3:] if isinstance(self.session, list) else []
         history_str = "\n".join([f"U: {m.get('u')} | L: {m.get('l')}" for m in recent_history])
 
         # 2. UPDATED AGENTIC PROMPT
@@ -106,31 +126,116 @@ class Luma:
         {history_str}
         """
 
-        payload = {
-            "model": self.cfg.local_model,
+        # DEEPWORK keeps replies terse whichever tier answers
+        tokens = min(tier["num_predict"], 60) if self.current_mode == "DEEPWORK" else tier["num_predict"]
+
+        return {
+            "model": tier["model"],
             # Pre-filling 'I' forces first-person persona
             "prompt": f"<|system|>\n{extensive_prompt}<|end|>\n<|user|>\n{text}<|end|>\n<|assistant|>\nI",
-            "stream": False,
+            "stream": stream,
             "options": {"num_predict": tokens, "temperature": 0.7, "top_p": 0.9}
         }
 
+    def interrupt(self):
+        """Barge-in / kill-switch: drop the pending generation and cut speech."""
+        if self._cancel is not None:
+            self._cancel.set()
+        self.is_thinking = False
+        if self.voice_engine:
+            self.voice_engine.stop_speaking()
+
+    def _generate_response(self, text, is_quiet):
+        self.is_thinking = True
+        self._cancel = cancel = threading.Event()
+
         try:
             print("LUMA_LOG: Sending to Ollama...")
-            res = requests.post(self.cfg.ollama_url, json=payload, timeout=20)
-            if res.status_code == 200:
-                # We must prepend 'I' back to the response since we pre-filled it
-                full_reply = "I " + res.json().get('response', '').strip()
-                
-                # Auto-log to session
-                self.ops.modify_knowledge("session.json", {"u": text, "l": full_reply}, mode="append")
-                self._dispatch_feedback(full_reply, is_quiet)
-            else:
-                self._dispatch_feedback("Cognitive uplink failed. Check Ollama.", is_quiet)
+            full_reply = "".join(self.stream_response(text, cancel=cancel)).strip()
+            if cancel.is_set():
+                print("LUMA_LOG: Generation cancelled by barge-in.")
+                return
+            self._dispatch_feedback(full_reply, is_quiet)
+        except RuntimeError as e:
+            print(f"LUMA_LOG: LLM Error: {e}")
+            self._dispatch_feedback("Cognitive uplink failed. Check Ollama.", is_quiet)
         except Exception as e:
             print(f"LUMA_LOG: LLM Error: {e}")
             self._dispatch_feedback("My connection to the neural net is unstable.", is_quiet)
         finally:
-            self.is_thinking = False
+            # A newer request may already own the flag
+            if self._cancel is cancel:
+                self.is_thinking = False
+                self._cancel = None
+
+    def stream_response(self, text, cancel=None):
+        """Yields the reply chunk by chunk from Ollama's streaming API.
+
+        The router picks the model tier from classify_intent(); a tier that is
+        missing, times out or errors before its first token hands over to the
+        next one. Blocking generator - run it off the event loop. Setting the
+        optional threading.Event `cancel` closes the uplink after the current chunk.
+        """
+        intent, _ = self.skills.classify_intent(text)
+        last_error = None
+
+        for name in self.router.candidates(intent):
+            tier = self.cfg.model_tiers[name]
+            payload = self._build_payload(text, tier, stream=True)
+            chunks = []
+            first_token_s = None
+            started = time.time()
+            self.router.begin(name)
+            try:
+                with requests.post(self.cfg.ollama_url, json=payload, stream=True,
+                                   timeout=(3, tier["timeout"])) as res:
+                    if res.status_code == 404:
+                        # Ollama answers 404 when the model isn't pulled
+                        self.router.mark_missing(name)
+                        last_error = RuntimeError(f"Model '{tier['model']}' not found")
+                        continue
+                    if res.status_code >= 500:
+                        # Busy (503) or the model failed to load (500) - treat like a stall
+                        self.router.mark_overloaded(name)
+                        last_error = RuntimeError(f"Ollama returned {res.status_code}")
+                        continue
+                    if res.status_code != 200:
+                        raise RuntimeError(f"Ollama returned {res.status_code}")
+                    for line in res.iter_lines():
+                        if cancel is not None and cancel.is_set():
+                            return
+                        if not line:
+                            continue
+                        part = json.loads(line)
+                        piece = part.get("response", "")
+                        if piece:
+                            if first_token_s is None:
+                                first_token_s = time.time() - started
+                                # We must prepend 'I' back to the response since we pre-filled it
+                                piece = "I " + piece.lstrip()
+                            chunks.append(piece)
+                            yield piece
+                        if part.get("done"):
+                            break
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if first_token_s is not None:
+                    raise  # Already streaming - too late to switch tiers
+                print(f"LUMA_LOG: Tier '{name}' stalled ({e}), falling back.")
+                self.router.record(name, tier["timeout"], tier["timeout"])
+                last_error = e
+                continue
+            finally:
+                self.router.end(name)
+                if first_token_s is not None:
+                    self.router.record(name, first_token_s, time.time() - started)
+
+            full_reply = "".join(chunks).strip() or "I"
+            # Auto-log to session
+            self.ops.modify_knowledge("session.json", {"u": text, "l": full_reply}, mode="append")
+            self.response_text = full_reply
+            return
+
+        raise last_error or RuntimeError("No model tier available")
 
     def _dispatch_feedback(self, text, is_quiet):
         self.response_text = text
@@ -1,6 +1,7 @@
 import json
 import datetime
 import time
+import threading
 from pathlib import Path
 
 class LumaOps:
@@ -9,6 +10,7 @@ class LumaOps:
         self.is_active = False
         self.progress = 0.0
         self.current_op = "IDLE"
+        self.lock = threading.Lock()  # Guards every JSON read-modify-write (service mode runs skills concurrently)
 
     def _load_json(self, filename, default_type=list):
             """Loads JSON with a safety net for empty files."""
@@ -42,6 +44,19 @@ class LumaOps:
             with open(path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4)
     
+    def modify_knowledge(self, filename, entry, mode="append"):
+        """Appends (or overwrites with) an entry in a JSON list archive."""
+        with self.lock:
+            data = self._load_json(filename, default_type=list)
+            # A dict here is a leftover session summary - start a fresh exchange log
+            if not isinstance(data, list):
+                data = []
+            if mode == "append":
+                data.append(entry)
+            else:
+                data = [entry]
+            self._save_json(filename, data)
+
     def write_session_summary(self, last_focus):
         """Finalizes the session and writes to session.json."""
         self.is_active = True
@@ -53,7 +68,8 @@ class LumaOps:
             "last_focus": last_focus
         }
         
-        self._save_json("session.json", summary) #
+        with self.lock:
+            self._save_json("session.json", summary) #
         
         self.is_active = False
         return "Session highlights have been indexed, Master Lau."
@@ -63,17 +79,19 @@ class LumaOps:
             self.is_active = True
             self.current_op = "SCRIBING THOUGHT"
             
-            # We ensure it loads as a list even if the file was empty
-            data = self._load_json("scribe_log.json", default_type=list)
-            
-            new_entry = {
-                "id": len(data) + 1,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "content": content
-            }
-            
-            data.append(new_entry)
-            self._save_json("scribe_log.json", data) #
+            # Read-modify-write under the lock so concurrent notes can't share an ID
+            with self.lock:
+                # We ensure it loads as a list even if the file was empty
+                data = self._load_json("scribe_log.json", default_type=list)
+                
+                new_entry = {
+                    "id": len(data) + 1,
+                    "timestamp": datetime.datetime.now().isoformat(),
+                    "content": content
+                }
+                
+                data.append(new_entry)
+                self._save_json("scribe_log.json", data) #
             
             self.is_active = False
             return new_entry["id"]
@@ -88,17 +106,18 @@ class LumaOps:
             self.progress = i / 10.0
             time.sleep(0.4) 
 
-        data = self._load_json("long_term_memory.json")
-        new_sol = {
-            "id": f"SOL_{datetime.datetime.now().strftime('%y%m%d_%H%M')}",
-            "title": solution_title,
-            "content": logic_summary,
-            "timestamp": datetime.datetime.now().isoformat()
-        }
-        # Assuming archived_solutions key exists
-        if "archived_solutions" not in data: data["archived_solutions"] = []
-        data["archived_solutions"].append(new_sol)
-        self._save_json("long_term_memory.json", data)
+        with self.lock:
+            data = self._load_json("long_term_memory.json")
+            new_sol = {
+                "id": f"SOL_{datetime.datetime.now().strftime('%y%m%d_%H%M')}",
+                "title": solution_title,
+                "content": logic_summary,
+                "timestamp": datetime.datetime.now().isoformat()
+            }
+            # Assuming archived_solutions key exists
+            if "archived_solutions" not in data: data["archived_solutions"] = []
+            data["archived_solutions"].append(new_sol)
+            self._save_json("long_term_memory.json", data)
         
         self.is_active = False
         self.progress = 0.0
@@ -109,17 +128,18 @@ class LumaOps:
         self.is_active = True
         self.current_op = "UPDATING PROJECTS"
         
-        # Load as a list, safety-checked by our new _load_json
-        data = self._load_json("projects.json", default_type=list)
-        
-        new_project_entry = {
-            "id": f"PRJ-{len(data) + 101}",
-            "timestamp": datetime.datetime.now().isoformat(),
-            "details": content
-        }
-        
-        data.append(new_project_entry)
-        self._save_json("projects.json", data)
+        with self.lock:
+            # Load as a list, safety-checked by our new _load_json
+            data = self._load_json("projects.json", default_type=list)
+            
+            new_project_entry = {
+                "id": f"PRJ-{len(data) + 101}",
+                "timestamp": datetime.datetime.now().isoformat(),
+                "details": content
+            }
+            
+            data.append(new_project_entry)
+            self._save_json("projects.json", data)
         
         self.is_active = False
         return new_project_entry["id"]
\ No newline at end of file
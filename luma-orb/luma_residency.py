@@ -0,0 +1,147 @@
+# luma_residency.py - Model Residency Manager (idle unload, mode gating, prefetch)
+import gc
+import time
+import threading
+from contextlib import contextmanager
+import psutil
+
+
+class ModelResidency:
+    """Keeps heavy models in RAM only while they earn their keep.
+
+    Models are registered with a loader (and optional unloader). They load on
+    first use or on prefetch(), and a background sweep drops them again after
+    Config.model_idle_unload seconds of disuse, or as soon as the current mode
+    (Config.mode_models) doesn't need them. A model is never dropped mid-use.
+
+    Resident memory is the process RSS growth measured while the model loaded
+    (loads are serialised so the figures don't overlap). It is a load-time
+    snapshot and doesn't track later growth such as inference buffers.
+    """
+    def __init__(self, cfg, mode_fn=None):
+        self.cfg = cfg
+        self.mode_fn = mode_fn  # Returns the current mode name, e.g. luma.current_mode
+        self.process = psutil.Process()
+        self.models = {}
+        self.lock = threading.Lock()
+        # One load at a time: RSS deltas are per-process, so overlapping loads would blur together
+        self.load_lock = threading.Lock()
+        self.is_running = False
+
+    def register(self, name, loader, unloader=None):
+        self.models[name] = {
+            "loader": loader,
+            "unloader": unloader,
+            "instance": None,
+            "load_lock": threading.Lock(),
+            "in_use": 0,
+            "last_used": 0.0,
+            "rss_mb": 0.0,
+            "loads": 0,
+        }
+
+    # --- ACCESS ---
+    def get(self, name):
+        """Returns the model, loading it synchronously if it isn't resident."""
+        entry = self.models[name]
+        entry["last_used"] = time.time()
+        if entry["instance"] is not None:
+            return entry["instance"]
+
+        with entry["load_lock"], self.load_lock:
+            if entry["instance"] is None:
+                print(f"LUMA_LOG: Loading {name} into memory...")
+                started = time.time()
+                before = self.process.memory_info().rss
+                instance = entry["loader"]()
+                # RSS delta is the honest figure - faster-whisper lives outside torch
+                entry["rss_mb"] = max(self.process.memory_info().rss - before, 0) / (1024 * 1024)
+                entry["instance"] = instance
+                entry["loads"] += 1
+                print(f"LUMA_LOG: {name} resident ({entry['rss_mb']:.0f} MB, {time.time() - started:.1f}s).")
+        entry["last_used"] = time.time()
+        return entry["instance"]
+
+    @contextmanager
+    def use(self, name):
+        """Pins the model for the duration of the block so the sweep can't unload it."""
+        entry = self.models[name]
+        with self.lock:
+            entry["in_use"] += 1
+        try:
+            yield self.get(name)
+        finally:
+            with self.lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.time()
+
+    def prefetch(self, name):
+        """Loads a model in the background ahead of need (wake word, chat open)."""
+        entry = self.models.get(name)
+        if entry is None or entry["instance"] is not None or entry["load_lock"].locked():
+            return
+        threading.Thread(target=self.get, args=(name,), daemon=True).start()
+
+    # --- EVICTION ---
+    def unload(self, name):
+        entry = self.models[name]
+        with self.lock:
+            if entry["instance"] is None or entry["in_use"]:
+                return False
+            instance, entry["instance"] = entry["instance"], None
+        if entry["unloader"]:
+            entry["unloader"](instance)
+        del instance
+        gc.collect()
+        print(f"LUMA_LOG: {name} unloaded (~{entry['rss_mb']:.0f} MB released).")
+        return True
+
+    def wanted(self, name):
+        """False when the current mode says this model can stand down."""
+        if self.mode_fn is None:
+            return True
+        allowed = self.cfg.mode_models.get(str(self.mode_fn()).lower())
+        return allowed is None or name in allowed
+
+    def sweep(self):
+        now = time.time()
+        for name, entry in self.models.items():
+            if entry["instance"] is None or entry["in_use"]:
+                continue
+            idle_limit = self.cfg.model_idle_unload.get(name)
+            idle = now - entry["last_used"]
+            # Give a just-used model a grace period even in a mode that excludes it
+            if not self.wanted(name) and idle > self.cfg.model_mode_grace:
+                self.unload(name)
+            elif idle_limit is not None and idle > idle_limit:
+                self.unload(name)
+
+    def start(self):
+        if not self.is_running:
+            self.is_running = True
+            threading.Thread(target=self._sweep_loop, daemon=True).start()
+
+    def stop(self):
+        self.is_running = False
+
+    def _sweep_loop(self):
+        while self.is_running:
+            time.sleep(self.cfg.model_sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"LUMA_LOG: Residency sweep failed: {e}")
+
+    def report(self):
+        """Per-model residency for the HUD/service: resident flag, RSS measured at load time, idle seconds."""
+        now = time.time()
+        return {
+            name: {
+                "resident": entry["instance"] is not None,
+                "rss_mb": round(entry["rss_mb"], 1) if entry["instance"] is not None else 0.0,
+                "idle_s": round(now - entry["last_used"], 1) if entry["last_used"] else None,
+                "in_use": entry["in_use"],
+                "loads": entry["loads"],
+            }
+            for name, entry in self.models.items()
+        }
@@ -0,0 +1,115 @@
+# luma_router.py - Model Tiering (fast vs. deep LLM routing with latency-aware fallback)
+import time
+import threading
+import requests
+
+
+class ModelRouter:
+    """Routes each query to a model tier and keeps score of how each tier is doing.
+
+    classify_intent() picks the preferred tier (CORE -> deep, SECONDARY -> fast;
+    short queries count as SECONDARY).
+    A tier is skipped when it is missing from Ollama, saturated, answering with
+    5xx, or degraded because its first-token latency drifted past budget; the
+    next tier in the chain takes the query instead.
+    """
+    INTENT_CHAINS = {
+        "CORE": ["deep", "fast"],
+        "SECONDARY": ["fast", "deep"],
+    }
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.tiers = cfg.model_tiers
+        self.lock = threading.Lock()
+        self.inflight = {name: 0 for name in self.tiers}
+        self.first_token = {name: None for name in self.tiers}  # EWMA seconds
+        self.total_time = {name: None for name in self.tiers}   # EWMA seconds
+        self.degraded_until = {name: 0.0 for name in self.tiers}
+        self.missing_until = {name: 0.0 for name in self.tiers}
+        self._installed = None
+        self._installed_at = 0.0
+
+    # --- ROUTING ---
+    def candidates(self, intent):
+        """Ordered tier names to try for an intent class, healthiest first."""
+        chain = self.INTENT_CHAINS.get(intent, ["deep", "fast"])
+        chain = [name for name in chain if name in self.tiers]
+        now = time.time()
+        installed = self.installed_models()
+        with self.lock:
+            healthy, fallback = [], []
+            for name in chain:
+                tier = self.tiers[name]
+                missing = now < self.missing_until[name] or (installed is not None and tier["model"] not in installed)
+                if missing:
+                    continue
+                busy = self.inflight[name] >= tier.get("max_inflight", 1)
+                slow = now < self.degraded_until[name]
+                (fallback if busy or slow else healthy).append(name)
+            # Everything unhealthy: still try in preference order rather than refuse
+            return healthy + fallback or chain
+
+    def installed_models(self):
+        """Model tags Ollama reports, cached for a minute. None if the check itself fails."""
+        if time.time() - self._installed_at < 60:
+            return self._installed
+        self._installed_at = time.time()
+        try:
+            tags_url = self.cfg.ollama_url.rsplit("/api/", 1)[0] + "/api/tags"
+            res = requests.get(tags_url, timeout=2)
+            names = {m.get("name", "") for m in res.json().get("models", [])}
+            # 'phi3' matches 'phi3:latest'
+            self._installed = names | {n.split(":")[0] for n in names if n.endswith(":latest")}
+        except Exception:
+            self._installed = None
+        return self._installed
+
+    # --- BOOKKEEPING ---
+    def begin(self, name):
+        with self.lock:
+            self.inflight[name] += 1
+
+    def end(self, name):
+        with self.lock:
+            self.inflight[name] -= 1
+
+    def mark_missing(self, name):
+        with self.lock:
+            self.missing_until[name] = time.time() + self.cfg.router_cooldown
+        print(f"LUMA_LOG: Model tier '{name}' unavailable, routing around it.")
+
+    def mark_overloaded(self, name):
+        with self.lock:
+            self.degraded_until[name] = time.time() + self.cfg.router_cooldown
+        print(f"LUMA_LOG: Model tier '{name}' overloaded, downgrading for {self.cfg.router_cooldown}s.")
+
+    def record(self, name, first_token_s, total_s):
+        """Folds one generation's latency into the tier's EWMA and degrades it if over budget."""
+        alpha = self.cfg.router_ewma_alpha
+        tier = self.tiers[name]
+        with self.lock:
+            prev = self.first_token[name]
+            self.first_token[name] = first_token_s if prev is None else prev + alpha * (first_token_s - prev)
+            prev = self.total_time[name]
+            self.total_time[name] = total_s if prev is None else prev + alpha * (total_s - prev)
+
+            if self.first_token[name] > tier["first_token_budget"]:
+                self.degraded_until[name] = time.time() + self.cfg.router_cooldown
+                # Reset to budget so the tier gets a fair retry once the cooldown lapses
+                self.first_token[name] = tier["first_token_budget"]
+                print(f"LUMA_LOG: Model tier '{name}' over first-token budget, downgrading for {self.cfg.router_cooldown}s.")
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: {
+                    "model": self.tiers[name]["model"],
+                    "inflight": self.inflight[name],
+                    "first_token_s": self.first_token[name],
+                    "total_s": self.total_time[name],
+                    "degraded": time.time() < self.degraded_until[name],
+                    "missing": time.time() < self.missing_until[name],
+                }
+                for name in self.tiers
+            }
@@ -0,0 +1,264 @@
+# luma_service.py - Headless Service Mode (asyncio + local HTTP/WebSocket API)
+import argparse
+import asyncio
+import base64
+import itertools
+import threading
+from collections import OrderedDict, deque
+from aiohttp import web, WSMsgType
+from config import Config
+from luma import Luma
+from luma_telemetry import LumaTelemetry
+
+
+class FairLLMScheduler:
+    """Round-robin access to the single LLM backend.
+
+    Every client gets its own queue; whenever a slot frees up, the next client
+    in rotation is served. One chatty script can't starve the HUDs.
+    """
+    def __init__(self, slots=1):
+        self.free = slots
+        self.queues = OrderedDict()  # client_id -> deque of waiting futures
+
+    async def acquire(self, client_id):
+        fut = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(client_id, deque()).append(fut)
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # Slot was granted just as we were cancelled
+            raise
+
+    def release(self):
+        self.free += 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.free and self.queues:
+            client_id, queue = next(iter(self.queues.items()))
+            fut = queue.popleft()
+            # Rotate the client to the back of the line
+            del self.queues[client_id]
+            if queue:
+                self.queues[client_id] = queue
+            if fut.cancelled():
+                continue
+            self.free -= 1
+            fut.set_result(None)
+
+    def waiting(self):
+        return sum(len(q) for q in self.queues.values())
+
+
+class LumaService:
+    """Runs the cognitive core, skills and ops behind a local API."""
+    def __init__(self, cfg, luma=None, telemetry=None, voice=None):
+        self.cfg = cfg
+        self.luma = luma or Luma(cfg)
+        self.telemetry = telemetry
+        self.luma.telemetry = telemetry
+        self.voice = voice  # Optional headless VoiceEngine for synthesized audio
+        if voice is not None:
+            voice.attach(self.luma)
+        self.scheduler = FairLLMScheduler(cfg.service_llm_slots)
+        self.clients = set()
+        self._ids = itertools.count(1)
+        self.last_replies = OrderedDict()  # client_id -> that client's last reply (bounded)
+
+    # --- CORE ---
+    async def respond(self, client_id, text, on_chunk=None):
+        """Runs one input through skills or the LLM. Returns (reply, source)."""
+        print(f"LUMA_LOG: [{client_id}] Processing input: {text} (service)")
+
+        # 1. Skill Check (Fast Path) - skills touch disk, keep them off the loop
+        last_reply = self.last_replies.get(client_id, "")
+        reply = await asyncio.to_thread(self.luma.run_skill, text, last_reply, True)
+        if reply is not None:
+            self.luma.response_text = reply
+            self._remember(client_id, reply)
+            if on_chunk:
+                await on_chunk(str(reply))
+            return reply, "skill"
+
+        # 2. LLM Generation (Slow Path) - fair-queued per client
+        await self.scheduler.acquire(client_id)
+        try:
+            reply = await self._stream_llm(text, on_chunk)
+        finally:
+            self.scheduler.release()
+        self._remember(client_id, reply)
+        return reply, "llm"
+
+    def _remember(self, client_id, reply):
+        self.last_replies[client_id] = str(reply)
+        self.last_replies.move_to_end(client_id)
+        while len(self.last_replies) > self.cfg.service_reply_memory:
+            self.last_replies.popitem(last=False)
+
+    async def _stream_llm(self, text, on_chunk):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancel = threading.Event()
+
+        def pump():
+            try:
+                for piece in self.luma.stream_response(text, cancel=cancel):
+                    loop.call_soon_threadsafe(queue.put_nowait, piece)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        worker = loop.run_in_executor(None, pump)
+        pieces = []
+        try:
+            while True:
+                piece = await queue.get()
+                if piece is None:
+                    break
+                if isinstance(piece, Exception):
+                    print(f"LUMA_LOG: LLM Error: {piece}")
+                    return "My connection to the neural net is unstable."
+                pieces.append(piece)
+                if on_chunk:
+                    await on_chunk(piece)
+        finally:
+            # Client gone or request cancelled: stop pulling tokens from Ollama, and keep
+            # the LLM slot until the worker has actually let go of the connection
+            cancel.set()
+            await asyncio.shield(worker)
+        return "".join(pieces).strip()
+
+    async def render_audio(self, reply):
+        if self.voice is None:
+            return None
+        wav = await asyncio.to_thread(self.voice.render_wav, reply)
+        return base64.b64encode(wav).decode("ascii")
+
+    def state(self):
+        ops = self.luma.ops
+        snapshot = {
+            "mode": self.luma.current_mode,
+            "is_thinking": self.scheduler.free < self.cfg.service_llm_slots,
+            "response_text": str(self.luma.response_text),
+            "ops": {"is_active": ops.is_active, "current_op": ops.current_op, "progress": ops.progress},
+            "clients": len(self.clients),
+            "queued": self.scheduler.waiting(),
+            "audio": self.voice is not None,
+            "models": self.luma.router.stats(),
+        }
+        if self.voice is not None:
+            snapshot["resident"] = self.voice.residency.report()
+        if self.telemetry:
+            snapshot["telemetry"] = {
+                "uptime": self.telemetry.uptime(),
+                "cpu": self.telemetry.cpu.latest(),
+                "mem": self.telemetry.mem.latest(),
+                "rss_mb": self.telemetry.rss_mb.latest(),
+                "cpu_history": self.telemetry.cpu.view().tolist(),
+                "thread_cpu": self.telemetry.thread_load(),
+                "weather": self.telemetry.weather.get(),
+            }
+        return snapshot
+
+    # --- HTTP ---
+    def _client_id(self, request):
+        # Local scripts all share 127.0.0.1, so anonymous requests each get their own queue
+        return request.headers.get("X-Luma-Client") or f"http-{next(self._ids)}"
+
+    async def handle_state(self, request):
+        return web.json_response(self.state())
+
+    async def handle_input(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body must be JSON"}, status=400)
+        if not isinstance(body, dict):
+            return web.json_response({"error": "body must be a JSON object"}, status=400)
+        text = str(body.get("text", "")).strip()
+        if not text:
+            return web.json_response({"error": "text is required"}, status=400)
+
+        reply, source = await self.respond(self._client_id(request), text)
+        result = {"reply": str(reply), "source": source}
+        if body.get("audio"):
+            result["audio"] = await self.render_audio(reply)
+        return web.json_response(result)
+
+    # --- WEBSOCKET ---
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        client_id = request.headers.get("X-Luma-Client") or f"ws-{next(self._ids)}"
+        self.clients.add(client_id)
+        print(f"LUMA_LOG: Client {client_id} linked.")
+
+        async def send_chunk(piece):
+            await ws.send_json({"type": "token", "text": piece})
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = msg.json()
+                except ValueError:
+                    await ws.send_json({"type": "error", "error": "invalid JSON"})
+                    continue
+                if not isinstance(data, dict):
+                    await ws.send_json({"type": "error", "error": "message must be a JSON object"})
+                    continue
+
+                if data.get("type") == "state":
+                    await ws.send_json({"type": "state", "state": self.state()})
+                elif data.get("type") == "input" and str(data.get("text", "")).strip():
+                    reply, source = await self.respond(client_id, str(data["text"]).strip(), send_chunk)
+                    await ws.send_json({"type": "reply", "text": str(reply), "source": source})
+                    if data.get("audio"):
+                        await ws.send_json({"type": "audio", "format": "wav", "data": await self.render_audio(reply)})
+                else:
+                    await ws.send_json({"type": "error", "error": "expected {type: input|state}"})
+        finally:
+            self.clients.discard(client_id)
+            print(f"LUMA_LOG: Client {client_id} unlinked.")
+        return ws
+
+    def create_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get("/state", self.handle_state),
+            web.post("/input", self.handle_input),
+            web.get("/ws", self.handle_ws),
+        ])
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="L.U.M.A. headless service")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--audio", action="store_true", help="Load XTTS and return synthesized replies")
+    args = parser.parse_args()
+
+    cfg = Config()
+    telemetry = LumaTelemetry(cfg)
+    telemetry.start()
+
+    voice = None
+    if args.audio:
+        # Heavy import, only when audio is requested
+        from voice_engine import VoiceEngine
+        voice = VoiceEngine(callback=None, headless=True, cfg=cfg)
+
+    service = LumaService(cfg, telemetry=telemetry, voice=voice)
+    print(f"LUMA_LOG: Headless core online at {args.host or cfg.service_host}:{args.port or cfg.service_port}")
+    web.run_app(service.create_app(), host=args.host or cfg.service_host,
+                port=args.port or cfg.service_port, print=None)
+
+
+if __name__ == "__main__":
+    main()
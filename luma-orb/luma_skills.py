@@ -2,6 +2,14 @@ import psutil
 import datetime
 import webbrowser
 from pathlib import Path
+from voice_templates import SpokenTemplate
+
+# Slot-templated replies: the fixed text is cached audio, only the slots get synthesized
+SCRIBE_REPLY = "Thought indexed, Lau. Scribe Entry {n} is secured."
+PROJECT_REPLY = "Project telemetry updated, Lau. Reference ID: {id}."
+ARCHIVE_REPLY = "Logic promoted to archive. ID: {id}."
+PULSE_REPLY = "CPU is holding at {cpu} percent, Master Lau."
+PULSE_RSS_REPLY = "CPU is holding at {cpu} percent, Master Lau. I'm using {rss} megabytes myself."
 
 class LumaSkills:
     def __init__(self, luma_instance, ops_instance):
@@ -23,14 +31,28 @@ class LumaSkills:
             "new project": self.manage_projects,
             "search memory": self.memory_recall,
             "what did i say about": self.memory_recall,
-            "recall note": self.memory_recall
+            "recall note": self.memory_recall,
+            "away mode": self.switch_mode,
+            "deep work mode": self.switch_mode,
+            "standard mode": self.switch_mode
         }
+        
+        # Skills that act on the host machine (refused for service clients)
+        self.host_only = {self.web_search_dispatch}
+        # Skills that work on the caller's previous reply rather than the shared one
+        self.reply_aware = {self.archive_logic}
+
+        # Handed to VoiceEngine.warm_templates at boot
+        self.templates = [SCRIBE_REPLY, PROJECT_REPLY, ARCHIVE_REPLY, PULSE_REPLY, PULSE_RSS_REPLY]
+        # Letters used by LumaOps IDs (PRJ-101, SOL_...), warmed alongside the number words
+        self.id_letters = "PRJSOL"
 
     def classify_intent(self, text):
-        """Triage: Engineering focus vs. Daily chatter."""
+        """Triage: Engineering focus vs. Daily chatter. Short queries stay on the fast tier."""
         tech_keywords = [".py", "fix", "code", "logic", "milestone", "luma-", "error"]
         is_tech = any(kw in text.lower() for kw in tech_keywords)
-        return ("CORE", 200) if is_tech else ("SECONDARY", 80)
+        is_short = len(text.split()) <= self.luma.cfg.router_short_words
+        return ("CORE", 200) if is_tech and not is_short else ("SECONDARY", 80)
     
     def memory_recall(self, text):
         """Scans the scribe_log for specific technical keywords."""
@@ -56,11 +78,19 @@ class LumaSkills:
         
         # This calls a new method we'll add to LumaOps
         project_id = self.ops.write_project_update(clean_text) 
-        return f"Project telemetry updated, Lau. Reference ID: {project_id}."
+        return SpokenTemplate(PROJECT_REPLY, id=project_id)
 
     def telemetry_pulse(self, text=None):
-        cpu = psutil.cpu_percent() #
-        return f"CPU is holding at {cpu} percent, Master Lau."
+        """Reads the sampler's rolling window instead of a zero-interval snapshot."""
+        telemetry = getattr(self.luma, "telemetry", None)
+        if telemetry and telemetry.cpu.count:
+            window = telemetry.cpu.view()[-10:]
+            cpu = round(float(window.mean()), 1)
+            rss = round(telemetry.rss_mb.latest())
+            return SpokenTemplate(PULSE_RSS_REPLY, cpu=cpu, rss=rss)
+        # No sampler attached: take a short blocking measurement so the figure is real
+        cpu = psutil.cpu_percent(interval=0.2)
+        return SpokenTemplate(PULSE_REPLY, cpu=cpu)
 
     def contextual_scribe(self, text):
         """Direct write to scribe_log.json via Ops."""
@@ -69,7 +99,7 @@ class LumaSkills:
                 text = text.lower().split(trigger)[-1].strip()
         
         note_id = self.ops.scribe_note(text) #
-        return f"Thought indexed, Lau. Scribe Entry {note_id} is secured."
+        return SpokenTemplate(SCRIBE_REPLY, n=note_id)
 
     def file_heartbeat(self, text):
         """Checks file activity for engineering projects."""
@@ -85,9 +115,19 @@ class LumaSkills:
         webbrowser.open(f"https://www.google.com/search?q={query}")
         return f"Opening an uplink for '{query}' now."
 
-    def archive_logic(self, text):
-        sol_id = self.ops.archive_to_long_term("Manual Archive", self.luma.response_text)
-        return f"Logic promoted to archive. ID: {sol_id}."
+    def archive_logic(self, text, last_reply=None):
+        reply = self.luma.response_text if last_reply is None else last_reply
+        if not str(reply).strip():
+            return "There's nothing of yours to archive yet, Lau."
+        sol_id = self.ops.archive_to_long_term("Manual Archive", str(reply))
+        return SpokenTemplate(ARCHIVE_REPLY, id=sol_id)
+
+    def switch_mode(self, text):
+        """Away drops XTTS after its grace period (Config.mode_models); deep work keeps replies terse."""
+        lowered = text.lower()
+        mode = "AWAY" if "away" in lowered else "DEEPWORK" if "deep work" in lowered else "STANDARD"
+        self.luma.set_mode(mode)
+        return f"{mode.title()} mode engaged, Lau."
 
     def save_session_summary(self, conversation_history):
         last_msg = conversation_history[-1] if conversation_history else "No activity."
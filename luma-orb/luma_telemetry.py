@@ -0,0 +1,171 @@
+# luma_telemetry.py - Background Station Telemetry (PULSE + HERNING_STN)
+import threading
+import time
+import datetime
+import numpy as np
+import psutil
+import requests
+
+
+class RingSeries:
+    """Fixed-size NumPy ring buffer for a single telemetry channel."""
+    def __init__(self, size):
+        self.size = size
+        self.data = np.zeros(size, dtype=np.float32)
+        self.head = 0   # Next write slot
+        self.count = 0  # Valid samples (caps at size)
+        self.lock = threading.Lock()
+
+    def push(self, value):
+        with self.lock:
+            self.data[self.head] = value
+            self.head = (self.head + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+
+    def view(self):
+        """Returns the samples oldest -> newest as a fresh array."""
+        with self.lock:
+            if self.count < self.size:
+                return self.data[:self.count].copy()
+            # np.roll copies, so the HUD never reads a half-written buffer
+            return np.roll(self.data, -self.head)
+
+    def latest(self, default=0.0):
+        with self.lock:
+            if self.count == 0:
+                return default
+            return float(self.data[(self.head - 1) % self.size])
+
+
+def open_meteo_fetch(lat, lon, timeout=4):
+    """Pulls the current conditions for the station from Open-Meteo."""
+    res = requests.get(
+        "https://api.open-meteo.com/v1/forecast",
+        params={"latitude": lat, "longitude": lon, "current_weather": "true"},
+        timeout=timeout,
+    )
+    res.raise_for_status()
+    current = res.json().get("current_weather", {})
+    return {
+        "temp_c": current.get("temperature"),
+        "wind_kmh": current.get("windspeed"),
+        "code": current.get("weathercode"),
+    }
+
+
+def stub_weather_fetch(lat=None, lon=None, timeout=None):
+    """Offline stand-in for Open-Meteo (tests and air-gapped sessions)."""
+    return {"temp_c": 7.5, "wind_kmh": 14.0, "code": 3}
+
+
+class WeatherCache:
+    """TTL cache around a weather fetcher. get() never blocks the HUD."""
+    def __init__(self, fetch_fn, lat, lon, ttl=600):
+        self.fetch_fn = fetch_fn
+        self.lat, self.lon = lat, lon
+        self.ttl = ttl
+        self.value = None
+        self.fetched_at = 0.0
+        self.is_fetching = False
+        self.lock = threading.Lock()
+
+    def get(self):
+        """Returns the last known conditions (or None) and refreshes in the background when stale."""
+        with self.lock:
+            stale = time.time() - self.fetched_at > self.ttl
+            if stale and not self.is_fetching:
+                self.is_fetching = True
+                threading.Thread(target=self._refresh, daemon=True).start()
+            return self.value
+
+    def _refresh(self):
+        try:
+            value = self.fetch_fn(self.lat, self.lon)
+            with self.lock:
+                self.value = value
+                self.fetched_at = time.time()
+        except Exception as e:
+            print(f"LUMA_LOG: Weather uplink failed: {e}")
+            # Back off for a full TTL instead of hammering the API every frame
+            with self.lock:
+                self.fetched_at = time.time()
+        finally:
+            self.is_fetching = False
+
+
+class LumaTelemetry:
+    """Samples CPU, memory, process RSS and per-thread CPU on a fixed cadence."""
+    def __init__(self, cfg, weather_fetch=None):
+        self.cfg = cfg
+        self.interval = cfg.telemetry_interval
+        self.history = cfg.telemetry_history
+        self.boot_time = time.time()
+        self.process = psutil.Process()
+
+        # 1. Ring-buffered series
+        self.cpu = RingSeries(self.history)
+        self.mem = RingSeries(self.history)
+        self.rss_mb = RingSeries(self.history)
+        self.thread_cpu = {}  # native thread id -> RingSeries
+        self._thread_times = {}
+
+        # 2. Weather (Open-Meteo unless the station is configured offline)
+        if weather_fetch is None:
+            weather_fetch = stub_weather_fetch if cfg.weather_source == "stub" else open_meteo_fetch
+        self.weather = WeatherCache(weather_fetch, cfg.weather_lat, cfg.weather_lon, ttl=cfg.weather_ttl)
+
+        self.is_running = False
+
+    def start(self):
+        if not self.is_running:
+            self.is_running = True
+            # Prime the counters so the first real sample is a true interval delta
+            psutil.cpu_percent(interval=None)
+            self._thread_times = self._read_thread_times()
+            threading.Thread(target=self._sample_loop, daemon=True).start()
+            print("LUMA_LOG: Telemetry sampler online.")
+
+    def stop(self):
+        self.is_running = False
+
+    def _read_thread_times(self):
+        try:
+            return {t.id: t.user_time + t.system_time for t in self.process.threads()}
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            return {}
+
+    def _sample_loop(self):
+        last = time.time()
+        while self.is_running:
+            time.sleep(self.interval)
+            now = time.time()
+            try:
+                self.sample(now - last)
+            except Exception as e:
+                print(f"LUMA_LOG: Telemetry sample failed: {e}")
+            last = now
+
+    def sample(self, elapsed):
+        """Records one sample across every channel. elapsed is the wall time since the last call."""
+        self.cpu.push(psutil.cpu_percent(interval=None))
+        self.mem.push(psutil.virtual_memory().percent)
+        self.rss_mb.push(self.process.memory_info().rss / (1024 * 1024))
+
+        times = self._read_thread_times()
+        for tid, total in times.items():
+            if tid not in self.thread_cpu:
+                self.thread_cpu[tid] = RingSeries(self.history)
+            delta = total - self._thread_times.get(tid, total)
+            self.thread_cpu[tid].push(100.0 * delta / max(elapsed, 1e-6))
+        # Drop series for threads that have exited
+        for tid in list(self.thread_cpu):
+            if tid not in times:
+                del self.thread_cpu[tid]
+        self._thread_times = times
+
+    def uptime(self):
+        return str(datetime.timedelta(seconds=int(time.time() - self.boot_time)))
+
+    def thread_load(self):
+        """Latest CPU percent per native thread id (the sampler may add/drop threads meanwhile)."""
+        return {tid: round(series.latest(), 1) for tid, series in list(self.thread_cpu.items())}
@@ -5,6 +5,7 @@ from config import Config
 from luma import Luma
 from energy_orb import EnergyOrb
 from luma_ops import LumaOps
+from luma_telemetry import LumaTelemetry
 import os
 from voice_engine import VoiceEngine
 import sys
@@ -41,9 +42,12 @@ class ChatInterface:
                 self.text = ""
                 
                 # --- VOICE KILL-SWITCH ---
-                # If you hit TAB while I'm talking, I'll stop immediately.
-                if self.active and luma.voice_engine:
-                    luma.voice_engine.stop() 
+                # If you hit TAB while I'm talking, I'll stop immediately (and keep listening).
+                if self.active:
+                    luma.interrupt()
+                    # Typing means a reply is coming - get XTTS resident ahead of it
+                    if luma.voice_engine:
+                        luma.voice_engine.residency.prefetch("xtts")
             
             elif self.active:
                 if event.key == pygame.K_RETURN:
@@ -162,11 +166,15 @@ def main():
         print(f"LUMA_LOG: Could not load taskbar icon: {e}")
     screen = pygame.display.set_mode((cfg.width, cfg.height))
     luma = Luma(cfg)
-    voice = VoiceEngine(luma.receive_input)
+    voice = VoiceEngine(luma.receive_input, cfg=cfg)
     luma.voice_engine = voice
+    telemetry = LumaTelemetry(cfg)
+    telemetry.start()
+    luma.telemetry = telemetry
     
     # STARTUP BRIEFING: Trigger as the system goes live
     luma.startup_briefing()
+    voice.warm_templates(luma.skills.templates, luma.skills.id_letters)
     
     voice.start_listening(luma)
     orb = EnergyOrb()
@@ -183,13 +191,15 @@ def main():
             if event.type == pygame.QUIT:
                 luma.refresh_knowledge()
                 luma.skills.save_session_summary([luma.response_text]) #
+                telemetry.stop()
+                voice.residency.stop()
                 running = False
             chat.handle_event(event, luma)
 
         # Draw HUD with Ops Progress
         orb.draw(screen, (cfg.width//2, cfg.height//2), cfg.radius, t, 
                  cfg.orb_idle, luma.is_thinking, luma.current_mode, cfg, 
-                 luma.ops, chat.active, luma.response_text, voice)
+                 luma.ops, chat.active, luma.response_text, voice, telemetry)
         
         chat.draw(screen) # Layer the chat interface
         pygame.display.flip()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules live flat in luma-orb/, next to this tests/ folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,94 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from config import Config
+from luma import Luma
+from luma_residency import ModelResidency
+
+
+def test_concurrent_loads_are_serialised():
+    residency = ModelResidency(SimpleNamespace())
+    active, overlaps = [0], []
+    guard = threading.Lock()
+
+    def loader():
+        with guard:
+            active[0] += 1
+            overlaps.append(active[0])
+        time.sleep(0.05)
+        with guard:
+            active[0] -= 1
+        return object()
+
+    residency.register("xtts", loader)
+    residency.register("whisper", loader)
+    threads = [threading.Thread(target=residency.get, args=(name,)) for name in ("xtts", "whisper")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(overlaps) == 1
+    assert all(entry["resident"] and entry["loads"] == 1 for entry in residency.report().values())
+
+
+def make_residency(monkeypatch, mode="standard"):
+    clock = [1000.0]
+    monkeypatch.setattr("luma_residency.time.time", lambda: clock[0])
+    cfg = SimpleNamespace(model_idle_unload={"xtts": 900, "whisper": None},
+                          mode_models={"away": ["whisper"]}, model_mode_grace=60)
+    current = [mode]
+    residency = ModelResidency(cfg, mode_fn=lambda: current[0])
+    unloaded = []
+    for name in ("xtts", "whisper"):
+        residency.register(name, object, unloader=lambda inst, name=name: unloaded.append(name))
+        residency.get(name)
+    return residency, clock, current, unloaded
+
+
+def test_sweep_unloads_after_idle_limit(monkeypatch):
+    residency, clock, _, unloaded = make_residency(monkeypatch)
+    clock[0] += 899
+    residency.sweep()
+    assert unloaded == []
+    clock[0] += 2
+    residency.sweep()
+    # Whisper has no idle limit and stays resident
+    assert unloaded == ["xtts"]
+    assert residency.report()["whisper"]["resident"]
+
+
+def test_sweep_drops_models_the_mode_excludes_after_grace(monkeypatch):
+    residency, clock, mode, unloaded = make_residency(monkeypatch)
+    mode[0] = "AWAY"
+    clock[0] += 30
+    residency.sweep()
+    assert unloaded == []
+    clock[0] += 31
+    residency.sweep()
+    assert unloaded == ["xtts"]
+
+
+def test_in_use_pins_model_through_sweep(monkeypatch):
+    residency, clock, mode, unloaded = make_residency(monkeypatch, mode="away")
+    with residency.use("xtts"):
+        clock[0] += 10_000
+        residency.sweep()
+        assert unloaded == []
+    residency.sweep()
+    # Leaving the block counts as a use, so the grace period starts over
+    assert unloaded == []
+    clock[0] += 61
+    residency.sweep()
+    assert unloaded == ["xtts"]
+
+
+def test_mode_skill_drives_residency(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core = Luma(Config())
+    residency = ModelResidency(core.cfg, mode_fn=lambda: core.current_mode)
+    assert "Away" in core.run_skill("luma, away mode please")
+    assert not residency.wanted("xtts") and residency.wanted("whisper")
+    core.run_skill("back to standard mode")
+    assert core.current_mode == "STANDARD" and residency.wanted("xtts")
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import luma
+import luma_router
+from config import Config
+from luma import Luma
+
+
+class FakeResponse:
+    def __init__(self, status_code, lines=()):
+        self.status_code = status_code
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+
+@pytest.fixture
+def core(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    instance = Luma(Config())
+    # Pretend Ollama has every configured model pulled
+    monkeypatch.setattr(instance.router, "installed_models", lambda: None)
+    return instance
+
+
+@pytest.mark.parametrize("status", [500, 503])
+def test_5xx_before_first_token_falls_through_to_next_tier(core, monkeypatch, status):
+    calls = []
+
+    def fake_post(url, json=None, **kwargs):
+        calls.append(json["model"])
+        if json["model"] == core.cfg.model_tiers["fast"]["model"]:
+            return FakeResponse(status)
+        done = [b'{"response": "am here", "done": false}', b'{"response": "", "done": true}']
+        return FakeResponse(200, done)
+
+    monkeypatch.setattr(luma.requests, "post", fake_post)
+    reply = "".join(core.stream_response("hello there"))
+
+    assert reply == "I am here"
+    assert calls == [core.cfg.model_tiers["fast"]["model"], core.cfg.model_tiers["deep"]["model"]]
+    assert core.router.stats()["fast"]["degraded"]
+    # Next casual query skips the overloaded tier
+    calls.clear()
+    "".join(core.stream_response("hi again"))
+    assert calls[0] == core.cfg.model_tiers["deep"]["model"]
+
+
+def test_all_tiers_5xx_raises(core, monkeypatch):
+    monkeypatch.setattr(luma.requests, "post", lambda *a, **k: FakeResponse(503))
+    with pytest.raises(RuntimeError, match="503"):
+        "".join(core.stream_response("hello there"))
+
+
+def test_short_or_casual_queries_prefer_fast_tier(core):
+    assert core.skills.classify_intent("fix it")[0] == "SECONDARY"
+    assert core.skills.classify_intent("how was your weekend, anything fun")[0] == "SECONDARY"
+    assert core.skills.classify_intent("can you fix the error in voice_pack.py compaction")[0] == "CORE"
+
+
+def test_first_token_over_budget_degrades_then_recovers(core, monkeypatch):
+    router = core.router
+    clock = [1000.0]
+    monkeypatch.setattr(luma_router.time, "time", lambda: clock[0])
+    budget = core.cfg.model_tiers["fast"]["first_token_budget"]
+
+    router.record("fast", budget * 0.5, 1.0)
+    assert router.candidates("SECONDARY") == ["fast", "deep"]
+    # EWMA climbs past budget after a few slow replies
+    for _ in range(5):
+        router.record("fast", budget * 3, 4.0)
+    assert router.stats()["fast"]["degraded"]
+    assert router.candidates("SECONDARY") == ["deep", "fast"]
+
+    clock[0] += core.cfg.router_cooldown + 1
+    assert not router.stats()["fast"]["degraded"]
+    assert router.candidates("SECONDARY") == ["fast", "deep"]
+
+
+def test_404_marks_tier_missing_and_skips_it(core, monkeypatch):
+    calls = []
+
+    def fake_post(url, json=None, **kwargs):
+        calls.append(json["model"])
+        if json["model"] == core.cfg.model_tiers["fast"]["model"]:
+            return FakeResponse(404)
+        return FakeResponse(200, [b'{"response": "am here", "done": true}'])
+
+    monkeypatch.setattr(luma.requests, "post", fake_post)
+    assert "".join(core.stream_response("hello there")) == "I am here"
+    assert core.router.stats()["fast"]["missing"]
+    # Missing tiers are dropped from the chain, not just demoted
+    assert core.router.candidates("SECONDARY") == ["deep"]
+
+
+def test_saturated_tier_moves_behind_healthy_one(core):
+    router = core.router
+    for _ in range(core.cfg.model_tiers["fast"]["max_inflight"]):
+        router.begin("fast")
+    assert router.candidates("SECONDARY") == ["deep", "fast"]
+    router.end("fast")
+    assert router.candidates("SECONDARY") == ["fast", "deep"]
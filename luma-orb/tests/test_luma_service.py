@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from config import Config
+from luma_ops import LumaOps
+from luma_service import FairLLMScheduler, LumaService
+
+
+def run_with_client(tmp_path, monkeypatch, scenario):
+    # Luma reads ./knowledge - keep the real archives out of it
+    monkeypatch.chdir(tmp_path)
+
+    async def main():
+        client = TestClient(TestServer(LumaService(Config()).create_app()))
+        await client.start_server()
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_malformed_http_bodies_are_400(tmp_path, monkeypatch):
+    async def scenario(client):
+        bad_json = await client.post("/input", data="not json", headers={"Content-Type": "application/json"})
+        not_object = await client.post("/input", json=["text", "hi"])
+        return bad_json.status, not_object.status
+    assert run_with_client(tmp_path, monkeypatch, scenario) == (400, 400)
+
+
+def test_malformed_ws_messages_get_error_replies(tmp_path, monkeypatch):
+    async def scenario(client):
+        ws = await client.ws_connect("/ws")
+        replies = []
+        for raw in ["not json", "[1, 2]", "42"]:
+            await ws.send_str(raw)
+            replies.append(await ws.receive_json())
+        # Connection survives and still answers
+        await ws.send_json({"type": "state"})
+        replies.append(await ws.receive_json())
+        await ws.close()
+        return replies
+    replies = run_with_client(tmp_path, monkeypatch, scenario)
+    assert [r["type"] for r in replies] == ["error", "error", "error", "state"]
+
+
+def test_concurrent_scribe_notes_get_unique_ids(tmp_path):
+    ops = LumaOps(knowledge_dir=tmp_path)
+    ids = []
+    threads = [threading.Thread(target=lambda i=i: ids.append(ops.scribe_note(f"note {i}"))) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(ids) == list(range(1, 21))
+    assert len(ops._load_json("scribe_log.json")) == 20
+
+
+def test_scheduler_serves_clients_round_robin():
+    async def main():
+        scheduler = FairLLMScheduler(slots=1)
+        order = []
+
+        async def job(client_id, n):
+            await scheduler.acquire(client_id)
+            order.append(f"{client_id}{n}")
+            await asyncio.sleep(0)
+            scheduler.release()
+
+        await scheduler.acquire("hold")  # Everyone queues behind this
+        tasks = [asyncio.create_task(job("a", n)) for n in range(3)]
+        tasks += [asyncio.create_task(job("b", n)) for n in range(2)]
+        await asyncio.sleep(0)
+        assert scheduler.waiting() == 5
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+    assert asyncio.run(main()) == ["a0", "b0", "a1", "b1", "a2"]
+
+
+def test_anonymous_http_requests_get_their_own_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = LumaService(Config())
+    seen = []
+
+    async def fake_respond(client_id, text, on_chunk=None):
+        seen.append(client_id)
+        return "ok", "skill"
+    service.respond = fake_respond
+
+    async def main():
+        client = TestClient(TestServer(service.create_app()))
+        await client.start_server()
+        try:
+            await client.post("/input", json={"text": "hi"})
+            await client.post("/input", json={"text": "hi"})
+            await client.post("/input", json={"text": "hi"}, headers={"X-Luma-Client": "hud"})
+        finally:
+            await client.close()
+    asyncio.run(main())
+    assert seen[0] != seen[1] and seen[2] == "hud"
+
+
+def test_slot_held_until_llm_worker_stops(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = LumaService(Config())
+    stopped = threading.Event()
+
+    def slow_stream(text, cancel=None):
+        yield "first"
+        cancel.wait(2)
+        # Ollama's next line arrives late; the worker only notices the cancel then
+        threading.Event().wait(0.2)
+        stopped.set()
+    monkeypatch.setattr(service.luma, "stream_response", slow_stream)
+
+    async def failing_chunk(piece):
+        raise ConnectionResetError("client gone")
+
+    async def main():
+        try:
+            await service.respond("a", "tell me a story", failing_chunk)
+        except ConnectionResetError:
+            pass
+        return stopped.is_set(), service.scheduler.free
+    assert asyncio.run(main()) == (True, 1)
+
+
+def test_service_skills_use_the_callers_reply_and_skip_host_actions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = LumaService(Config())
+    archived = []
+    monkeypatch.setattr(service.luma.ops, "archive_to_long_term", lambda title, content: archived.append(content) or "SOL_1")
+    monkeypatch.setattr("luma_skills.webbrowser.open", lambda url: archived.append(url))
+
+    async def main():
+        service.last_replies["a"] = "client a's answer"
+        service.luma.response_text = "client b's answer"
+        await service.respond("a", "archive this")
+        empty, _ = await service.respond("c", "archive this")
+        search, _ = await service.respond("a", "search for ducks")
+        return empty, search
+    empty, search = asyncio.run(main())
+    assert archived == ["client a's answer"]
+    assert "nothing" in empty and "station" in search
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import numpy as np
+
+from config import Config
+from luma_telemetry import LumaTelemetry, RingSeries, WeatherCache, stub_weather_fetch
+
+
+def test_ring_series_wraps_oldest_to_newest():
+    series = RingSeries(4)
+    assert series.latest(default=-1) == -1
+    for v in range(3):
+        series.push(v)
+    assert series.view().tolist() == [0, 1, 2]
+    for v in range(3, 7):
+        series.push(v)
+    assert series.view().tolist() == [3, 4, 5, 6]
+    assert series.latest() == 6
+
+
+def test_ring_series_view_is_a_copy():
+    series = RingSeries(2)
+    series.push(1)
+    view = series.view()
+    series.push(2)
+    assert view.tolist() == [1]
+
+
+def test_weather_cache_never_blocks_and_refreshes_after_ttl():
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(lat, lon):
+        calls.append(time.time())
+        release.wait(2)
+        return stub_weather_fetch(lat, lon)
+
+    cache = WeatherCache(slow_fetch, 56.1, 8.9, ttl=0.1)
+    started = time.time()
+    assert cache.get() is None  # Fetch is still in flight
+    assert time.time() - started < 0.5
+    release.set()
+    deadline = time.time() + 2
+    while cache.get() is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get()["temp_c"] == 7.5
+    assert len(calls) == 1
+
+    time.sleep(0.15)
+    cache.get()
+    deadline = time.time() + 2
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2
+
+
+def test_sample_fills_every_channel():
+    cfg = Config()
+    cfg.weather_source = "stub"
+    telemetry = LumaTelemetry(cfg)
+    telemetry._thread_times = telemetry._read_thread_times()
+    telemetry.sample(1.0)
+    telemetry.sample(1.0)
+    assert telemetry.cpu.count == 2 and telemetry.mem.count == 2
+    assert telemetry.rss_mb.latest() > 0
+    assert threading.main_thread().native_id in telemetry.thread_load()
+    assert all(np.isfinite(v) for v in telemetry.thread_load().values())
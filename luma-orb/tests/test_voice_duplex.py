@@ -0,0 +1,68 @@
+import numpy as np
+
+from voice_duplex import EchoSuppressor, UtteranceSegmenter
+
+RATE = 16000
+BLOCK = 320
+
+
+def feed(seg, audio, t0=0.0):
+    closed = []
+    for i in range(0, len(audio) - BLOCK + 1, BLOCK):
+        result = seg.push(audio[i:i + BLOCK], t0 + i / RATE)
+        if result:
+            closed.append(result[1])
+    return closed
+
+
+def noise(seconds, rms, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(RATE * seconds)) * rms).astype(np.float32)
+
+
+def test_floor_adapts_to_steady_noise_above_start_threshold():
+    seg = UtteranceSegmenter(rate=RATE)
+    onsets = feed(seg, noise(30, 0.02))
+    # A few false starts while the floor climbs, then silence
+    assert all(t < 10 for t in onsets), onsets
+
+
+def test_speech_over_learned_noise_is_still_detected():
+    seg = UtteranceSegmenter(rate=RATE)
+    feed(seg, noise(15, 0.02))
+    speech = noise(1, 0.02, seed=1) + 0.3 * np.sin(np.arange(RATE) * 0.1).astype(np.float32)
+    tail = noise(1, 0.02, seed=2)
+    assert len(feed(seg, np.concatenate((speech, tail)), t0=15.0)) == 1
+
+
+def echo_setup(seconds=4, gain=0.5, room_lag=20):
+    """Reference noise played through a fake room: delayed by the mixer estimate + room_lag, attenuated."""
+    ref = noise(seconds, 0.2, seed=1)
+    suppressor = EchoSuppressor(rate=RATE)
+    suppressor.set_reference((ref * 32767).astype(np.int16).tobytes(), RATE, 0.0)
+    lag = suppressor.delay + room_lag
+    mic = np.zeros_like(ref)
+    mic[lag:] = gain * ref[:-lag]
+    return suppressor, mic
+
+
+def test_echo_converges_to_gated_silence():
+    suppressor, mic = echo_setup()
+    peaks = [float(np.abs(suppressor.process(mic[i:i + BLOCK].copy(), i / RATE)).max())
+             for i in range(0, len(mic) - BLOCK + 1, BLOCK)]
+    # Allow a second to converge, then every block is gated
+    assert all(p == 0.0 for p in peaks[RATE // BLOCK:]), peaks
+    assert int(np.argmax(np.abs(suppressor.weights))) == 20
+
+
+def test_double_talk_passes_through():
+    suppressor, mic = echo_setup()
+    for i in range(0, 2 * RATE, BLOCK):
+        suppressor.process(mic[i:i + BLOCK].copy(), i / RATE)
+    weights = suppressor.weights.copy()
+
+    start = 3 * RATE
+    voice = (np.sin(np.arange(BLOCK) * 0.3) * 0.3).astype(np.float32)
+    out = suppressor.process(mic[start:start + BLOCK] + voice, start / RATE)
+    assert np.corrcoef(out, voice)[0, 1] > 0.99
+    # Adaptation froze, so the filter didn't learn the user's voice
+    assert np.array_equal(weights, suppressor.weights)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+
+import numpy as np
+
+import voice_pack
+from voice_pack import VoicePack
+
+
+def key(text):
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def pcm(value, n=1000):
+    return np.full(n, value, dtype=np.int16).tobytes()
+
+
+def test_compact_reclaims_evicted_space(tmp_path):
+    pack = VoicePack(tmp_path)
+    for i in range(4):
+        pack.put(key(str(i)), pcm(i), 24000)
+    pack.evict(key("1"))
+    assert pack.compact() == 2000
+    view, rate = pack.get(key("3"))
+    assert np.frombuffer(view, dtype=np.int16)[0] == 3 and rate == 24000
+    view.release()
+    pack.close()
+    assert key("1") not in VoicePack(tmp_path)
+
+
+def test_compact_deferred_while_orphaned_map_is_alive(tmp_path):
+    pack = VoicePack(tmp_path)
+    pack.put(key("a"), pcm(1), 24000)
+    held, _ = pack.get(key("a"))
+    # Growing the pack forces a remap while `held` pins the old mapping
+    pack.put(key("b"), pcm(2), 24000)
+    pack.get(key("b"))[0].release()
+    pack.evict(key("b"))
+    assert pack._orphans
+    assert pack.compact() == 0
+    held.release()
+    assert pack.compact() == 2000
+
+
+def test_failed_replace_keeps_pack_usable(tmp_path, monkeypatch):
+    pack = VoicePack(tmp_path)
+    pack.put(key("a"), pcm(1), 24000)
+    pack.put(key("b"), pcm(2), 24000)
+    pack.evict(key("a"))
+
+    def refuse(src, dst):
+        raise PermissionError("file in use")
+    monkeypatch.setattr(voice_pack.os, "replace", refuse)
+    assert pack.compact() == 0
+    monkeypatch.setattr(voice_pack.os, "replace", os.replace)
+
+    # Handles were reopened, so writes and reads still work
+    pack.put(key("c"), pcm(3), 24000)
+    view, _ = pack.get(key("c"))
+    assert np.frombuffer(view, dtype=np.int16)[0] == 3
+    view.release()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_crash_before_switch_keeps_old_pair(tmp_path, monkeypatch):
+    pack = VoicePack(tmp_path)
+    for i in range(3):
+        pack.put(key(str(i)), pcm(i), 24000)
+    pack.evict(key("0"))
+
+    class Crash(BaseException):
+        pass
+
+    def die(src, dst):
+        raise Crash()
+    monkeypatch.setattr(voice_pack.os, "replace", die)
+    try:
+        pack.compact()
+    except Crash:
+        pass
+    monkeypatch.setattr(voice_pack.os, "replace", os.replace)
+
+    # Next start ignores the half-written generation and reads the old pair
+    reopened = VoicePack(tmp_path)
+    view, _ = reopened.get(key("1"))
+    assert np.frombuffer(view, dtype=np.int16)[0] == 1
+    view.release()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["voice_cache.idx", "voice_cache.pack"]
+
+
+def test_compacted_generation_survives_restart(tmp_path):
+    pack = VoicePack(tmp_path)
+    for i in range(3):
+        pack.put(key(str(i)), pcm(i), 24000)
+    pack.evict(key("0"))
+    assert pack.compact() == 2000
+    pack.put(key("3"), pcm(3), 24000)
+    pack.close()
+
+    reopened = VoicePack(tmp_path)
+    for i in (1, 2, 3):
+        view, _ = reopened.get(key(str(i)))
+        assert np.frombuffer(view, dtype=np.int16)[0] == i
+        view.release()
+    assert key("0") not in reopened
+    assert not (tmp_path / "voice_cache.pack").exists()
+
+
+def test_import_wavs_removes_migrated_files(tmp_path):
+    import wave
+    wav_path = tmp_path / f"{key('hello')}.wav"
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(24000)
+        wf.writeframes(pcm(5))
+
+    pack = VoicePack(tmp_path)
+    assert pack.import_wavs(tmp_path) == 1
+    assert not wav_path.exists()
+    # Evicted phrases stay evicted across restarts
+    pack.evict(key("hello"))
+    pack.close()
+    reopened = VoicePack(tmp_path)
+    assert reopened.import_wavs(tmp_path) == 0
+    assert key("hello") not in reopened
@@ -0,0 +1,27 @@
+from luma_skills import SCRIBE_REPLY, PROJECT_REPLY, ARCHIVE_REPLY
+from voice_templates import SpokenTemplate, split_template, slot_tokens, warm_vocabulary
+
+
+def test_new_scribe_ids_need_no_synthesis():
+    warm = set(warm_vocabulary([SCRIBE_REPLY]))
+    for note_id in range(1, 5000):
+        reply = SpokenTemplate(SCRIBE_REPLY, n=note_id)
+        misses = [v for kind, v in split_template(reply.template, reply.slots)
+                  if kind != "pause" and v not in warm]
+        assert misses == [], (note_id, misses)
+
+
+def test_project_and_archive_ids_need_no_synthesis():
+    warm = set(warm_vocabulary([PROJECT_REPLY, ARCHIVE_REPLY], "PRJSOL"))
+    replies = [SpokenTemplate(PROJECT_REPLY, id=f"PRJ-{n}") for n in range(101, 1500)]
+    replies.append(SpokenTemplate(ARCHIVE_REPLY, id="SOL_260212_1730"))
+    for reply in replies:
+        for kind, v in split_template(reply.template, reply.slots):
+            assert kind == "pause" or v in warm, (str(reply), v)
+
+
+def test_slot_tokens_use_words_not_single_characters():
+    assert slot_tokens("PRJ-101") == ["pee", "ar", "jay", "one", "hundred", "one"]
+    assert slot_tokens(12.5) == ["twelve", "point", "five"]
+    assert slot_tokens(40) == ["forty"]
+    assert slot_tokens("0042") == ["zero", "zero", "four", "two"]
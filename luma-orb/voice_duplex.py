@@ -0,0 +1,123 @@
+# voice_duplex.py - Full-Duplex Helpers (echo suppression + utterance segmentation)
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class EchoSuppressor:
+    """Removes Luma's own voice from the microphone feed.
+
+    The PCM being played is registered as a reference. Each mic block is run
+    through a block-NLMS adaptive filter that learns the speaker -> room -> mic
+    path and subtracts the predicted echo; whatever residual is still small
+    relative to the reference is gated to silence. A human talking over her
+    leaves a residual well above the gate, so barge-in still gets through.
+    """
+    def __init__(self, rate=16000, taps=512, mu=0.1, delay_ms=60, gate_ratio=0.25):
+        self.rate = rate
+        self.taps = taps
+        self.mu = mu
+        self.delay = int(rate * delay_ms / 1000)  # Mixer/output latency estimate
+        self.gate_ratio = gate_ratio
+        self.weights = np.zeros(taps, dtype=np.float32)
+        self.reference = None
+        self.ref_start = 0.0
+        self.lock = threading.Lock()
+
+    def set_reference(self, pcm, rate, start_time):
+        """Registers the 16-bit mono buffer that just started playing at start_time (monotonic)."""
+        ref = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if rate != self.rate:
+            n = int(len(ref) * self.rate / rate)
+            ref = np.interp(np.linspace(0, len(ref) - 1, n), np.arange(len(ref)), ref).astype(np.float32)
+        with self.lock:
+            # Pad the front so every mic block has a full filter history
+            self.reference = np.concatenate((np.zeros(self.taps - 1 + self.delay, dtype=np.float32), ref))
+            self.ref_start = start_time
+
+    def clear_reference(self):
+        with self.lock:
+            self.reference = None
+
+    def is_active(self):
+        return self.reference is not None
+
+    def process(self, block, block_time):
+        """Returns the echo-suppressed copy of a float32 mic block captured at block_time."""
+        with self.lock:
+            ref = self.reference
+            ref_start = self.ref_start
+        if ref is None:
+            return block
+
+        n = len(block)
+        # Index of this block's first sample inside the padded reference
+        start = int((block_time - ref_start) * self.rate)
+        if start < 0 or start + n + self.taps - 1 > len(ref):
+            return block  # Outside the playback window
+        window = ref[start:start + n + self.taps - 1]
+        X = sliding_window_view(window, self.taps)[:, ::-1]  # (n, taps), newest sample first
+
+        # Block NLMS: one vectorised update per block instead of per sample
+        echo = X @ self.weights
+        residual = block - echo
+        ref_rms = float(np.sqrt(np.mean(window[-n:] ** 2)))
+        res_rms = float(np.sqrt(np.mean(residual ** 2)))
+
+        # Freeze adaptation during double-talk so the filter doesn't learn the user's voice
+        if res_rms < ref_rms:
+            power = float(np.sum(X * X)) / n + 1e-6  # Per-row input energy
+            self.weights += (self.mu / power) * (X.T @ residual)
+
+        # Residual gate: what's left is still mostly echo unless it's clearly louder than the reference
+        if res_rms < self.gate_ratio * ref_rms:
+            return np.zeros_like(block)
+        return residual.astype(np.float32)
+
+
+class UtteranceSegmenter:
+    """Energy VAD: groups voiced mic blocks into utterances for Whisper."""
+    def __init__(self, rate=16000, start_ratio=3.0, hang_ms=400, max_ms=3000, min_ms=250, floor_rise=1.005):
+        self.rate = rate
+        self.start_ratio = start_ratio
+        self.hang = int(rate * hang_ms / 1000)
+        self.max_len = int(rate * max_ms / 1000)
+        self.min_len = int(rate * min_ms / 1000)
+        self.noise_floor = 0.005
+        # Minimum tracker: drops instantly to quieter blocks, creeps up ~0.5% per block
+        # otherwise, so steady room noise above the start threshold is learned too
+        self.floor_rise = floor_rise
+        self.buffer = []
+        self.length = 0
+        self.silent_run = 0
+        self.voiced_at = None  # Monotonic time speech onset was first seen
+
+    def push(self, block, block_time):
+        """Feeds one block. Returns (audio, onset_time) when an utterance closes, else None."""
+        rms = float(np.sqrt(np.mean(block ** 2)))
+        voiced = rms > self.noise_floor * self.start_ratio
+
+        # Gated (all-zero) blocks say nothing about the room
+        if rms > 0:
+            self.noise_floor = min(self.noise_floor * self.floor_rise, max(rms, 1e-4))
+
+        if not self.buffer:
+            if not voiced:
+                return None
+            self.voiced_at = block_time
+
+        self.buffer.append(block)
+        self.length += len(block)
+        self.silent_run = 0 if voiced else self.silent_run + len(block)
+
+        if self.silent_run >= self.hang or self.length >= self.max_len:
+            audio = np.concatenate(self.buffer)
+            onset = self.voiced_at
+            self.buffer, self.length, self.silent_run = [], 0, 0
+            if len(audio) >= self.min_len:
+                return audio, onset
+        return None
+
+    def is_open(self):
+        """True while an utterance is being collected (speech onset seen)."""
+        return bool(self.buffer)
@@ -10,9 +10,18 @@ import hashlib
 import threading
 import os
 import time
-import speech_recognition as sr
+import queue
+import sounddevice as sd
 import torchaudio
 import pathlib
+import io
+import wave
+import numpy as np
+from voice_pack import VoicePack
+from voice_templates import SpokenTemplate, split_template, warm_vocabulary, trim_silence, crossfade_concat
+from voice_duplex import EchoSuppressor, UtteranceSegmenter
+from luma_residency import ModelResidency
+from config import Config
 
 
 # 1. THE STABILIZER
@@ -39,22 +48,37 @@ torch.serialization.add_safe_globals([
 os.environ["COQUI_TOS_AGREED"] = "1"
 
 class VoiceEngine:
-    def __init__(self, callback):
+    def __init__(self, callback, headless=False, cfg=None):
         # 1. Define the device FIRST
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.cfg = cfg or Config()
         print(f"LUMA_LOG: Initializing Neural Voice on {self.device.upper()}...")
 
-        # 2. Now use self.device for both models
-        from faster_whisper import WhisperModel
-        self.stt_model = WhisperModel("tiny.en", device=self.device, compute_type="int8")
-        self.tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(self.device)
+        # 2. Models load on demand and stand down when idle (see luma_residency.py)
+        self.residency = ModelResidency(self.cfg)
+        self.residency.register("whisper", self._load_whisper)
+        self.residency.register("xtts", self._load_xtts, self._unload_torch)
+        self.residency.start()
         
         # 3. Status and hardware setup [cite: 2026-02-11]
         self.is_listening = False 
         self.is_speaking = False
         self.callback = callback
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.headless = headless
+        
+        # Full-duplex capture (see voice_duplex.py). Headless service mode never starts it.
+        self.mic_rate = 16000           # Whisper's native rate
+        self.block_size = 320           # 20ms blocks
+        self._mic_queue = queue.Queue()
+        self._mic_stream = None
+        self.echo = EchoSuppressor(rate=self.mic_rate)
+        self.segmenter = UtteranceSegmenter(rate=self.mic_rate)
+        self.phrase_window_ms = 3000    # Max utterance while idle
+        self.barge_in_window_ms = 1200  # Max utterance while she speaks
+        self.barge_in_budget_ms = 1500  # Onset -> playback cut
+        self.duck_volume = 0.3
+        self._channel = None
+        self._speech_gen = 0            # Bumped on every interrupt; stale speak threads stay silent
         
         # Anchor to the 'luma-orb' folder where THIS file lives
         self.local_dir = pathlib.Path(__file__).parent.absolute()
@@ -64,120 +88,317 @@ class VoiceEngine:
         self.cache_dir = self.local_dir / "assets" / "voice_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        pygame.mixer.init()
+        # Packed cache: one append-only PCM pack + offset index, mmap'd for playback
+        self.sample_rate = 24000  # XTTS-v2 native output rate
+        self.voice_pack = VoicePack(self.cache_dir, codec="pcm", max_bytes=512 * 1024 * 1024)
+        self.voice_pack.import_wavs(self.cache_dir)
+        
+        # Template stitching (see voice_templates.py)
+        self.synth_lock = threading.Lock()
+        self.crossfade_ms = 12
+        self.pause_ms = 180
+        
+        # Mixer runs at the pack's native format so segments play without conversion.
+        # pygame.init() has already opened it at 44.1kHz stereo, so re-open it.
+        if not headless:
+            pygame.mixer.quit()
+            pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=1)
+
+    def _load_whisper(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel("tiny.en", device=self.device, compute_type="int8")
+
+    def _load_xtts(self):
+        tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(self.device)
+        if self.device == "cpu" and self.cfg.xtts_int8:
+            # XTTS's GPT blocks use HF Conv1D (most of the weights); quantize_dynamic only
+            # knows nn.Linear, so convert them first or they'd stay fp32.
+            converted = self._conv1d_to_linear(tts.synthesizer.tts_model)
+            # Dynamic int8: Linear weights stored as int8, activations quantized on the fly.
+            # In place, so the fp32 weights are freed rather than duplicated.
+            torch.ao.quantization.quantize_dynamic(
+                tts.synthesizer.tts_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            print(f"LUMA_LOG: XTTS quantized to dynamic int8 for CPU inference ({converted} Conv1D layers converted).")
+        return tts
 
-    def _get_cache_path(self, text):
+    def _conv1d_to_linear(self, module):
+        """Swaps HF Conv1D (y = x @ W + b, W shaped in x out) for an equivalent nn.Linear."""
+        converted = 0
+        for name, child in module.named_children():
+            if type(child).__name__ == "Conv1D" and hasattr(child, "nf"):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features, bias=child.bias is not None)
+                with torch.no_grad():
+                    linear.weight.copy_(child.weight.t())
+                    if child.bias is not None:
+                        linear.bias.copy_(child.bias)
+                setattr(module, name, linear)
+                converted += 1
+            else:
+                converted += self._conv1d_to_linear(child)
+        return converted
+
+    def _unload_torch(self, model):
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+
+    def _get_cache_key(self, text):
         """Hashes the text to check for existing neural audio."""
-        text_hash = hashlib.md5(text.lower().strip().encode()).hexdigest()
-        return self.cache_dir / f"{text_hash}.wav"
+        return hashlib.md5(text.lower().strip().encode()).hexdigest()
+
+    def attach(self, luma_instance):
+        """Lets the residency manager follow Luma's current mode."""
+        self.residency.mode_fn = lambda: luma_instance.current_mode
 
     def start_listening(self, luma_instance):
-        """Activates the sensory array's listening loop."""
+        """Activates the sensory array's listening loop.
+
+        Capture runs full-duplex: the mic stays open while she speaks, and the
+        echo suppressor keeps her own voice out of the transcription path.
+        """
         if not self.is_listening:
             self.is_listening = True
+            self.attach(luma_instance)
+
+            def _on_block(indata, frames, time_info, status):
+                # Timestamp the block's first sample so it lines up with the playback reference
+                self._mic_queue.put((indata[:, 0].copy(), time.monotonic() - frames / self.mic_rate))
+
+            self._mic_stream = sd.InputStream(samplerate=self.mic_rate, channels=1, dtype="float32",
+                                              blocksize=self.block_size, callback=_on_block)
+            self._mic_stream.start()
             # Threaded to keep the Herning Hub UI at 60FPS
             threading.Thread(target=self._listen_loop, args=(luma_instance,), daemon=True).start()
             print("LUMA_LOG: Sensory array active and listening.")
             
     def _listen_loop(self, luma):
-        """Restored local listener loop using Faster-Whisper."""
-        import io # Ensure this is at the top of your file
-        
+        """Full-duplex listener: echo suppression -> VAD -> Faster-Whisper -> wake word."""
         # WARMUP: One dummy pass to ensure the model is in RAM
         try:
-            self.stt_model.transcribe(io.BytesIO(b"")) 
-        except:
+            with self.residency.use("whisper") as stt:
+                stt.transcribe(np.zeros(self.mic_rate // 2, dtype=np.float32))
+        except Exception:
             pass
         print("LUMA_LOG: Whisper engine is warm and listening.")
 
         while self.is_listening:
-            # We only listen if I'm not already thinking or speaking
-            if not luma.is_thinking and not self.is_speaking:
+            try:
+                block, block_time = self._mic_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                clean = self.echo.process(block, block_time)
+
+                # Shorter utterances while she talks, so a barge-in is confirmed quickly
+                self.segmenter.max_len = int(self.mic_rate * (self.barge_in_window_ms if self.is_speaking else self.phrase_window_ms) / 1000)
+                was_open = self.segmenter.is_open()
+                result = self.segmenter.push(clean, block_time)
+
+                if not was_open and self.segmenter.is_open():
+                    # Speech onset: have Whisper resident by the time the utterance closes
+                    self.residency.prefetch("whisper")
+                    # Duck the instant someone talks over her; the hard cut waits for Whisper
+                    if self.is_speaking:
+                        self._duck(True)
+                if result is None:
+                    # Too short to transcribe: the utterance was dropped, so un-duck
+                    if was_open and not self.segmenter.is_open():
+                        self._duck(False)
+                    continue
+                audio, onset = result
+
                 try:
-                    with self.microphone as source:
-                        # Quick ambient check for better accuracy
-                        self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
-                        # Short timeout for snappier response times
-                        audio = self.recognizer.listen(source, timeout=0.8, phrase_time_limit=3)
-                    
-                    # 1. Convert audio to memory buffer
-                    wav_data = io.BytesIO(audio.get_wav_data())
-                    
-                    # 2. Local Whisper Inference
-                    segments, _ = self.stt_model.transcribe(wav_data, beam_size=1)
-                    text = "".join([s.text for s in segments]).lower().strip()
+                    # Local Whisper Inference
+                    with self.residency.use("whisper") as stt:
+                        segments, _ = stt.transcribe(audio, beam_size=1, language="en",
+                                                     without_timestamps=True)
+                        text = "".join([s.text for s in segments]).lower().strip()
 
-                    # 3. Wake Word Detection [cite: 2026-02-10]
+                    # Wake Word Detection [cite: 2026-02-10]
                     if "luma" in text:
+                        # A reply is coming - start bringing XTTS back while the ack plays from cache
+                        self.residency.prefetch("xtts")
+                        if self.is_speaking or luma.is_thinking:
+                            self._barge_in(luma, onset)
                         # Snappy acknowledgement in the new neural voice
                         self.speak("Ready and waiting, Lau.") 
                         self._capture_cmd()
-                        
-                except (sr.WaitTimeoutError, sr.UnknownValueError):
-                    continue
-                except Exception as e:
-                    print(f"LUMA_LOG: Sensory Error: {e}")
-                    time.sleep(0.2)
-            
-            # Slight sleep to prevent CPU thread-locking
-            time.sleep(0.05)
+                finally:
+                    # Whatever Whisper made of it (or if it raised), don't leave her ducked
+                    self._duck(False)
+                    
+            except Exception as e:
+                print(f"LUMA_LOG: Sensory Error: {e}")
+                time.sleep(0.2)
+
+    def _barge_in(self, luma, onset):
+        """Wake word over her own voice: cut playback and drop the pending generation."""
+        luma.interrupt()
+        latency_ms = (time.monotonic() - onset) * 1000
+        print(f"LUMA_LOG: Barge-in handled {latency_ms:.0f}ms after speech onset.")
+        if latency_ms > self.barge_in_budget_ms:
+            print(f"LUMA_LOG: WARNING - barge-in over the {self.barge_in_budget_ms}ms budget.")
+
+    def _duck(self, on):
+        channel = self._channel
+        if channel is not None:
+            channel.set_volume(self.duck_volume if on else 1.0)
+
+    def _synthesize(self, text):
+        """Returns (pcm_buffer, rate) from the voice pack, synthesizing on a miss."""
+        key = self._get_cache_key(text)
+        cached = self.voice_pack.get(key)
+        if cached is not None:
+            return cached
+
+        # XTTS is not re-entrant - one synthesis at a time
+        with self.synth_lock:
+            if key not in self.voice_pack:
+                print(f"LUMA_LOG: Synthesizing Irish lilt for: '{text[:30]}...'")
+                with self.residency.use("xtts") as tts:
+                    wav = np.asarray(tts.tts(
+                        text=text,
+                        speaker_wav=self.voice_seed,
+                        language="en"
+                    ), dtype=np.float32)
+                    rate = tts.synthesizer.output_sample_rate
+                # Peak-normalise like tts_to_file did, then store raw 16-bit PCM
+                wav = wav / max(0.01, float(np.max(np.abs(wav)))) if wav.size else wav
+                pcm = (wav * 32767).astype(np.int16)
+                self.voice_pack.put(key, pcm.tobytes(), rate)
+        return self.voice_pack.get(key)
+
+    def _compose_template(self, phrase):
+        """Stitches cached fixed fragments and slot vocabulary into one utterance."""
+        chunks, rate = [], self.sample_rate
+        for kind, value in split_template(phrase.template, phrase.slots):
+            if kind == "pause":
+                chunks.append(None)
+                continue
+            pcm, rate = self._synthesize(value)
+            audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+            pcm.release()
+            chunks.append(trim_silence(audio))
+
+        # Resolve breaths once the sample rate is known
+        pause = np.zeros(int(rate * self.pause_ms / 1000), dtype=np.float32)
+        chunks = [pause if c is None else c for c in chunks]
+
+        composed = crossfade_concat(chunks, rate, self.crossfade_ms)
+        return memoryview((np.clip(composed, -1.0, 1.0) * 32767).astype(np.int16).tobytes()), rate
+
+    def warm_templates(self, templates, id_letters=""):
+        """Pre-synthesizes template fragments and the bounded slot vocabulary in the background."""
+        def _run():
+            vocab = warm_vocabulary(templates, id_letters)
+            for item in vocab:
+                self._synthesize(item)[0].release()
+            print(f"LUMA_LOG: Template vocabulary primed ({len(vocab)} fragments).")
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _play(self, pcm, rate):
+        """Blocking playback of a 16-bit mono PCM buffer - no file open, no decode."""
+        source = pcm  # The pack's view; `pcm` may be rebound to a resampled copy below
+        try:
+            if pygame.mixer.get_init() is None:
+                pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=1)
+
+            mixer_rate = pygame.mixer.get_init()[0]
+            if rate != mixer_rate:
+                # Rare path (legacy imports at another rate): linear resample to the mixer
+                src = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+                n = int(len(src) * mixer_rate / rate)
+                pcm = np.interp(np.linspace(0, len(src) - 1, n), np.arange(len(src)), src).astype(np.int16)
+
+            sound = pygame.mixer.Sound(buffer=pcm)
+            sound.set_volume(1.0)
+            channel = sound.play()
+            # Hand the exact samples to the echo suppressor as the far-end reference
+            self.echo.set_reference(pcm, mixer_rate, time.monotonic())
+            self._channel = channel
+
+            # CRITICAL: Keep the thread alive while audio is playing
+            while channel is not None and channel.get_busy():
+                pygame.time.Clock().tick(50)
+        except Exception as e:
+            print(f"LUMA_LOG: Vocal Playback Error: {e}")
+        finally:
+            self._channel = None
+            self.echo.clear_reference()
+            # Let go of the mmap view so compaction can run
+            if isinstance(source, memoryview):
+                source.release()
+
+    def render_wav(self, text):
+        """Synthesizes text (or a SpokenTemplate) into WAV bytes for remote clients."""
+        if isinstance(text, SpokenTemplate):
+            pcm, rate = self._compose_template(text)
+        else:
+            pcm, rate = self._synthesize(text)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm)
+        pcm.release()
+        return buf.getvalue()
 
     def speak(self, text):
-            """Speaks using the cache or generates a new Irish-lilted clone."""
+            """Speaks using the cache or generates a new Irish-lilted clone.
+
+            SpokenTemplate replies only synthesize their slot values; the fixed
+            fragments come straight from the cache.
+            """
             def _run():
+                gen = self._speech_gen
                 self.is_speaking = True
-                cache_path = self._get_cache_path(text)
-                
-                # 1. FIXED PATHING
-                # Always output new generations to a fixed temp file in the assets folder
-                temp_output = str(self.local_dir / "assets" / "speech_temp.wav")
-                audio_to_play = str(cache_path) if cache_path.exists() else temp_output
-                
-                if not cache_path.exists():
-                    print(f"LUMA_LOG: Synthesizing Irish lilt for: '{text[:30]}...'")
-                    self.tts.tts_to_file(
-                        text=text,
-                        speaker_wav=self.voice_seed,
-                        language="en",
-                        file_path=temp_output
-                    )
-                    # Cache it for next time so we save CPU cycles
-                    import shutil
-                    shutil.copy(temp_output, cache_path)
-
-                # 2. STABLE PLAYBACK
                 try:
-                    if pygame.mixer.get_init() is None:
-                        pygame.mixer.init()
-                    
-                    pygame.mixer.music.load(audio_to_play)
-                    pygame.mixer.music.set_volume(1.0) 
-                    pygame.mixer.music.play()
-                    
-                    # CRITICAL: Keep the thread alive while audio is playing
-                    while pygame.mixer.music.get_busy():
-                        pygame.time.Clock().tick(10)
+                    if isinstance(text, SpokenTemplate):
+                        pcm, rate = self._compose_template(text)
+                    else:
+                        pcm, rate = self._synthesize(text)
+                    # Interrupted while synthesizing - don't start talking again
+                    if gen == self._speech_gen:
+                        self._play(pcm, rate)
+                    else:
+                        pcm.release()
                 except Exception as e:
-                    print(f"LUMA_LOG: Vocal Playback Error: {e}")
+                    print(f"LUMA_LOG: Vocal Synthesis Error: {e}")
+                if gen == self._speech_gen:
+                    self.is_speaking = False
 
-                self.is_speaking = False
+                # Reclaim evicted space once it's a meaningful share of the pack
+                if self.voice_pack.dead_bytes > self.voice_pack.live_bytes() // 4:
+                    self.voice_pack.compact()
 
             threading.Thread(target=_run, daemon=True).start()
             
-    def stop(self):
-        """Emergency stop for all sensory and vocal output."""
-        # 1. Kill the vocal cords
+    def stop_speaking(self):
+        """Cuts vocal output. The sensory array keeps listening."""
+        self._speech_gen += 1
         try:
             if pygame.mixer.get_init():
-                pygame.mixer.music.stop()
-                pygame.mixer.music.unload()
-            self.is_speaking = False
+                pygame.mixer.stop()
             print("LUMA_LOG: Vocal output terminated.")
         except Exception as e:
             print(f"LUMA_LOG: Error stopping mixer: {e}")
+        self.echo.clear_reference()
+        self.is_speaking = False
+
+    def stop(self):
+        """Emergency stop for all sensory and vocal output."""
+        # 1. Kill the vocal cords
+        self.stop_speaking()
 
         # 2. Silence the sensory array
         self.is_listening = False
+        if self._mic_stream is not None:
+            self._mic_stream.close()
+            self._mic_stream = None
         print("LUMA_LOG: Sensory array standing down.")
 
     def _capture_cmd(self):
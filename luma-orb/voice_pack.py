@@ -0,0 +1,312 @@
+# voice_pack.py - Packed Voice Cache (append-only PCM pack + offset index, mmap reads)
+import io
+import os
+import mmap
+import time
+import struct
+import threading
+import numpy as np
+from pathlib import Path
+
+# Index record: md5 digest, pack offset, byte length, sample rate, codec
+RECORD = struct.Struct("<16sQIIB")
+CODEC_PCM = 0
+CODEC_FLAC = 1
+CODEC_EVICTED = 255
+
+
+class VoicePack:
+    """Single-file store for synthesized speech.
+
+    Segments are appended to `<name>.pack` as raw 16-bit mono PCM (or FLAC) and
+    located through a tiny fixed-width index in `<name>.idx`. The index is itself
+    an append-only log, so a crash mid-write only loses the last record. Reads
+    come straight out of an mmap of the pack - no per-phrase open() or decode.
+
+    compact() writes a new pack/index pair under the next generation name
+    (`<name>.<gen>.pack`) and switches to it by replacing the one-line
+    `<name>.gen` manifest, so a crash leaves either the old pair or the new one.
+    """
+    def __init__(self, directory, name="voice_cache", codec="pcm", max_bytes=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.manifest_path = self.directory / f"{name}.gen"
+        self.generation = self._read_generation()
+        self.pack_path, self.idx_path = self._paths(self.generation)
+        self.codec = CODEC_FLAC if codec == "flac" else CODEC_PCM
+        self.max_bytes = max_bytes
+
+        self.index = {}       # digest -> (offset, length, rate, codec)
+        self.last_used = {}   # digest -> timestamp (LRU eviction)
+        self.dead_bytes = 0   # Space held by evicted/overwritten segments
+        self.lock = threading.RLock()
+        self._map = None
+        self._map_size = 0
+        self._orphans = []    # Old mappings still pinned by a reader's view
+
+        self.pack_path.touch(exist_ok=True)
+        self._remove_stale_generations()
+        self._load_index()
+        self._open_handles()
+
+    # --- GENERATIONS ---
+    def _paths(self, generation):
+        """Pack/index paths for a generation; generation 0 keeps the original names."""
+        stem = f"{self.name}.{generation}" if generation else self.name
+        return self.directory / f"{stem}.pack", self.directory / f"{stem}.idx"
+
+    def _read_generation(self):
+        try:
+            return int(self.manifest_path.read_text().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def _remove_stale_generations(self):
+        """Deletes pairs left behind by an interrupted or unfinished compaction."""
+        live = {self.pack_path, self.idx_path}
+        stale = [self.directory / f"{self.name}.pack", self.directory / f"{self.name}.idx"]
+        stale += list(self.directory.glob(f"{self.name}.*.pack")) + list(self.directory.glob(f"{self.name}.*.idx"))
+        stale += list(self.directory.glob(f"{self.name}.*.tmp"))
+        for path in stale:
+            if path not in live:
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    pass  # Still locked (Windows); retried on the next start
+
+    def _open_handles(self):
+        self._pack = open(self.pack_path, "ab")
+        self._idx = open(self.idx_path, "ab")
+        # Dedicated read handle for the mmap; the append handle is write-only
+        self._reader = open(self.pack_path, "rb")
+
+    def _close_handles(self):
+        self._pack.close()
+        self._idx.close()
+        self._reader.close()
+
+    def _unmap(self):
+        """Drops the current mapping. Returns False if a reader still holds a view."""
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                return False
+            self._map = None
+        return True
+
+    def _reap_orphans(self):
+        """Closes orphaned mappings whose views have been released. True once none remain."""
+        alive = []
+        for old in self._orphans:
+            try:
+                old.close()
+            except BufferError:
+                alive.append(old)
+        self._orphans = alive
+        return not alive
+
+    # --- INDEX ---
+    def _load_index(self):
+        if not self.idx_path.exists():
+            return
+        raw = self.idx_path.read_bytes()
+        pack_size = self.pack_path.stat().st_size
+        # A torn trailing record (crash mid-append) is simply ignored
+        usable = len(raw) - (len(raw) % RECORD.size)
+        for digest, offset, length, rate, codec in RECORD.iter_unpack(raw[:usable]):
+            old = self.index.pop(digest, None)
+            if old:
+                self.dead_bytes += old[1]
+            if codec != CODEC_EVICTED and offset + length <= pack_size:
+                self.index[digest] = (offset, length, rate, codec)
+
+    def _append_record(self, digest, offset, length, rate, codec):
+        self._idx.write(RECORD.pack(digest, offset, length, rate, codec))
+        self._idx.flush()
+
+    # --- READS ---
+    def _view(self, offset, length):
+        """Zero-copy slice of the pack, remapping if the pack has grown."""
+        if length == 0:
+            return memoryview(b"")
+        if self._map is None or offset + length > self._map_size:
+            # A view still held by the mixer pins the old map; track it until it is released
+            if not self._unmap():
+                self._orphans.append(self._map)
+                self._map = None
+            self._reap_orphans()
+            self._map_size = self.pack_path.stat().st_size
+            self._map = mmap.mmap(self._reader.fileno(), self._map_size, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[offset:offset + length]
+
+    def __contains__(self, key):
+        return bytes.fromhex(key) in self.index
+
+    def get(self, key):
+        """Returns (pcm_buffer, sample_rate) or None.
+
+        For PCM segments the buffer is a memoryview into the mmap - copy it
+        (or hand it to the mixer) before the next compact().
+        """
+        digest = bytes.fromhex(key)
+        with self.lock:
+            entry = self.index.get(digest)
+            if entry is None:
+                return None
+            offset, length, rate, codec = entry
+            self.last_used[digest] = time.time()
+            view = self._view(offset, length)
+            if codec == CODEC_FLAC:
+                import soundfile as sf
+                audio, rate = sf.read(io.BytesIO(view), dtype="int16")
+                view.release()
+                return memoryview(audio.tobytes()), rate
+            return view, rate
+
+    # --- WRITES ---
+    def put(self, key, pcm_bytes, rate):
+        """Appends a 16-bit mono PCM segment under key (an md5 hex digest)."""
+        digest = bytes.fromhex(key)
+        payload = bytes(pcm_bytes)
+        codec = self.codec
+        if codec == CODEC_FLAC:
+            import soundfile as sf
+            buf = io.BytesIO()
+            sf.write(buf, np.frombuffer(payload, dtype=np.int16), rate, format="FLAC")
+            payload = buf.getvalue()
+
+        with self.lock:
+            self._pack.seek(0, os.SEEK_END)
+            offset = self._pack.tell()
+            self._pack.write(payload)
+            self._pack.flush()
+            # Data first, then the index record that points at it
+            self._append_record(digest, offset, len(payload), rate, codec)
+            old = self.index.get(digest)
+            if old:
+                self.dead_bytes += old[1]
+            self.index[digest] = (offset, len(payload), rate, codec)
+            self.last_used[digest] = time.time()
+            self._enforce_budget()
+
+    def evict(self, key):
+        with self.lock:
+            self._evict_digest(bytes.fromhex(key))
+
+    def _evict_digest(self, digest):
+        entry = self.index.pop(digest, None)
+        if entry:
+            self.dead_bytes += entry[1]
+            self.last_used.pop(digest, None)
+            self._append_record(digest, 0, 0, 0, CODEC_EVICTED)
+
+    def _enforce_budget(self):
+        """Evicts least-recently-used segments once live data exceeds max_bytes."""
+        if not self.max_bytes:
+            return
+        live = self.live_bytes()
+        for digest in sorted(self.index, key=lambda d: self.last_used.get(d, 0)):
+            if live <= self.max_bytes:
+                break
+            live -= self.index[digest][1]
+            self._evict_digest(digest)
+
+    def live_bytes(self):
+        return sum(entry[1] for entry in self.index.values())
+
+    # --- MAINTENANCE ---
+    def compact(self):
+        """Rewrites the pack with only live segments, reclaiming evicted space.
+
+        Returns the number of bytes reclaimed, or 0 if a reader still holds a
+        view into the pack (compaction is retried on the next call).
+        """
+        with self.lock:
+            if self.dead_bytes == 0:
+                return 0
+            # Any live mapping keeps the file open, and Windows then refuses the replace
+            if not self._unmap() or not self._reap_orphans():
+                print("LUMA_LOG: Voice pack busy, compaction deferred.")
+                return 0
+
+            generation = self.generation + 1
+            new_pack, new_idx = self._paths(generation)
+            new_index = {}
+            with open(self.pack_path, "rb") as src, open(new_pack, "wb") as dst, open(new_idx, "wb") as idx:
+                for digest, (offset, length, rate, codec) in sorted(self.index.items(), key=lambda kv: kv[1][0]):
+                    src.seek(offset)
+                    new_offset = dst.tell()
+                    dst.write(src.read(length))
+                    idx.write(RECORD.pack(digest, new_offset, length, rate, codec))
+                    new_index[digest] = (new_offset, length, rate, codec)
+                # The new pair must be on disk before the manifest points at it
+                for f in (dst, idx):
+                    f.flush()
+                    os.fsync(f.fileno())
+            tmp_manifest = self.manifest_path.with_suffix(".gen.tmp")
+            tmp_manifest.write_text(str(generation))
+
+            # Windows won't replace files with open handles
+            self._close_handles()
+            old_paths = (self.pack_path, self.idx_path)
+            try:
+                try:
+                    # The single atomic switch: pack and index change together
+                    os.replace(tmp_manifest, self.manifest_path)
+                except OSError as e:
+                    print(f"LUMA_LOG: Voice pack compaction failed, keeping old pack: {e}")
+                    for path in (new_pack, new_idx, tmp_manifest):
+                        path.unlink(missing_ok=True)
+                    return 0
+                reclaimed = self.dead_bytes
+                self.generation = generation
+                self.pack_path, self.idx_path = new_pack, new_idx
+                self.index = new_index
+                self.dead_bytes = 0
+            finally:
+                self._open_handles()
+
+            for path in old_paths:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass  # Cleaned up on the next start
+
+            print(f"LUMA_LOG: Voice pack compacted, {reclaimed // 1024} KB reclaimed.")
+            return reclaimed
+
+    def import_wavs(self, wav_dir):
+        """One-off migration of the legacy one-WAV-per-phrase cache.
+
+        Each WAV is deleted once its audio is in the pack, so the next start has
+        nothing to scan and LRU-evicted phrases don't come back.
+        """
+        from voice_templates import read_wav
+        imported = 0
+        for wav in Path(wav_dir).glob("*.wav"):
+            key = wav.stem
+            if len(key) != 32:
+                continue
+            if key not in self:
+                try:
+                    audio, rate = read_wav(wav)
+                except Exception as e:
+                    print(f"LUMA_LOG: Skipping unreadable cache file {wav.name}: {e}")
+                    continue
+                self.put(key, (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes(), rate)
+                imported += 1
+            try:
+                wav.unlink()
+            except OSError as e:
+                print(f"LUMA_LOG: Could not remove migrated cache file {wav.name}: {e}")
+        if imported:
+            print(f"LUMA_LOG: Migrated {imported} cached phrases into the voice pack.")
+        return imported
+
+    def close(self):
+        with self.lock:
+            self._unmap()
+            self._reap_orphans()
+            self._close_handles()
@@ -0,0 +1,142 @@
+# voice_templates.py - Slot-Templated Speech (cached fragments + synthesized slots)
+import re
+import wave
+import string
+import numpy as np
+
+
+class SpokenTemplate(str):
+    """A reply that still behaves like plain text, but remembers its template and slot values.
+
+    The VoiceEngine uses .template/.slots to stitch cached fixed fragments around
+    the variable parts instead of synthesizing the whole sentence.
+    """
+    def __new__(cls, template, **slots):
+        obj = super().__new__(cls, template.format(**slots))
+        obj.template = template
+        obj.slots = slots
+        return obj
+
+
+def split_template(template, slots):
+    """Breaks a template into ('text', fragment), ('slot', token) and ('pause', None) parts."""
+    parts = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        fragment = literal.strip()
+        if fragment and re.search(r"[A-Za-z0-9]", fragment):
+            parts.append(("text", fragment))
+        elif re.search(r"[.!?,:]", fragment):
+            # Punctuation-only gaps become a breath instead of a synth call
+            parts.append(("pause", None))
+        if field and field in slots:
+            parts.extend(("slot", tok) for tok in slot_tokens(slots[field]))
+    return parts
+
+
+ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+        "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+        "seventeen", "eighteen", "nineteen"]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+# Spelled-out letters are voiced as their names; XTTS mangles one-character prompts
+LETTER_NAMES = {
+    "A": "ay", "B": "bee", "C": "see", "D": "dee", "E": "ee", "F": "eff", "G": "gee",
+    "H": "aitch", "I": "eye", "J": "jay", "K": "kay", "L": "ell", "M": "em", "N": "en",
+    "O": "oh", "P": "pee", "Q": "cue", "R": "ar", "S": "ess", "T": "tee", "U": "you",
+    "V": "vee", "W": "double you", "X": "ex", "Y": "why", "Z": "zed",
+}
+
+
+def number_words(n):
+    """0-999 as words from the bounded ONES/TENS/'hundred' vocabulary."""
+    hundreds, rest = divmod(n, 100)
+    words = [ONES[hundreds], "hundred"] if hundreds else []
+    if rest or not hundreds:
+        if rest < 20:
+            words.append(ONES[rest])
+        else:
+            tens, ones = divmod(rest, 10)
+            words.append(TENS[tens])
+            if ones:
+                words.append(ONES[ones])
+    return words
+
+
+def slot_vocabulary(letters=""):
+    """Every token slot_tokens() can emit for numbers plus the given ID letters.
+
+    Warming this set means numeric and ID slots never need a fresh synthesis.
+    """
+    vocab = ONES + TENS[2:] + ["hundred", "point"]
+    vocab += [LETTER_NAMES[c] for c in dict.fromkeys(letters.upper()) if c in LETTER_NAMES]
+    return vocab
+
+
+def warm_vocabulary(templates, letters=""):
+    """Everything worth pre-synthesizing: each template's fixed fragments plus slot_vocabulary()."""
+    vocab = slot_vocabulary(letters)
+    for template in templates:
+        vocab.extend(v for kind, v in split_template(template, {}) if kind == "text")
+    return list(dict.fromkeys(vocab))
+
+
+def slot_tokens(value):
+    """Splits a slot value into small, reusable vocabulary tokens.
+
+    "PRJ-101" -> ["pee", "ar", "jay", "one", "hundred", "one"],
+    "12.5" -> ["twelve", "point", "five"].
+    """
+    tokens = []
+    for run in re.findall(r"[A-Za-z]+|\d+|(?<=\d)\.(?=\d)", str(value)):
+        if run == ".":
+            tokens.append("point")
+        elif run.isdigit():
+            # Short numbers are spoken as words; long IDs digit by digit
+            if len(run) <= 3 and not (len(run) > 1 and run.startswith("0")):
+                tokens.extend(number_words(int(run)))
+            else:
+                tokens.extend(ONES[int(d)] for d in run)
+        elif run.isupper() and len(run) <= 4:
+            tokens.extend(LETTER_NAMES[c] for c in run)  # Acronyms are spelled out
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def read_wav(path):
+    """Loads a 16-bit PCM WAV as mono float32 plus its sample rate."""
+    with wave.open(str(path), "rb") as wf:
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    audio = pcm.astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio, rate
+
+
+def trim_silence(audio, threshold=0.02, pad=240):
+    """Cuts XTTS's leading/trailing dead air so fragments butt up naturally."""
+    voiced = np.flatnonzero(np.abs(audio) > threshold)
+    if voiced.size == 0:
+        return audio[:0]
+    start = max(voiced[0] - pad, 0)
+    end = min(voiced[-1] + pad, len(audio))
+    return audio[start:end]
+
+
+def crossfade_concat(chunks, rate, fade_ms=12):
+    """Joins audio chunks with an equal-power crossfade at every seam."""
+    chunks = [c for c in chunks if len(c)]
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    out = chunks[0]
+    fade = int(rate * fade_ms / 1000)
+    for chunk in chunks[1:]:
+        n = min(fade, len(out), len(chunk))
+        if n == 0:
+            out = np.concatenate((out, chunk))
+            continue
+        ramp = np.linspace(0.0, np.pi / 2, n, dtype=np.float32)
+        seam = out[-n:] * np.cos(ramp) + chunk[:n] * np.sin(ramp)
+        out = np.concatenate((out[:-n], seam, chunk[n:]))
+    return out